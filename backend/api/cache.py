@@ -0,0 +1,37 @@
+"""
+Per-user caching for analytics endpoints and background task ownership
+"""
+import time
+from django.core.cache import cache
+
+ANALYTICS_CACHE_TTL = 300  # 5 minutes
+TASK_OWNER_TTL = 60 * 60 * 24  # matches Celery's default result expiry
+
+
+def _version_key(user_id):
+    return f'analytics:{user_id}:version'
+
+
+def analytics_cache_key(user_id, name, *parts):
+    """Build a cache key scoped to the user's current analytics version"""
+    version = cache.get_or_set(_version_key(user_id), time.time_ns, None)
+    return ':'.join(['analytics', str(user_id), str(version), name, *map(str, parts)])
+
+
+def invalidate_analytics_cache(user_id):
+    """Orphan every cached analytics entry for a user by moving to a new version"""
+    cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def _task_owner_key(task_id):
+    return f'task:{task_id}:owner'
+
+
+def remember_task_owner(task_id, user_id):
+    """Record which user started a background task, for task_status"""
+    cache.set(_task_owner_key(task_id), user_id, TASK_OWNER_TTL)
+
+
+def get_task_owner(task_id):
+    """User ID that started the task, or None if unknown or expired"""
+    return cache.get(_task_owner_key(task_id))
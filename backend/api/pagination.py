@@ -0,0 +1,20 @@
+"""
+Pagination classes for REST API
+"""
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Cursor pagination over the (user, date) index
+    Page cost stays constant no matter how deep the client scrolls
+    """
+    page_size = 50
+    ordering = ('-date', '-created_at', '-id')
+
+
+class StandardPagination(PageNumberPagination):
+    """Page number pagination for small per-user collections"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
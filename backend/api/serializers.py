@@ -1,6 +1,7 @@
 """
 Serializers for REST API
 """
+from copy import copy
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from transactions.models import Transaction, Category, Budget
@@ -8,7 +9,22 @@ from transactions.models import Transaction, Category, Budget
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class CachedFieldsSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that builds its field map once per class
+    Each instance gets shallow copies instead of a fresh deepcopy
+    """
+    _fields_cache = None
+    
+    def get_fields(self):
+        cls = type(self)
+        # Look in the class's own __dict__ so subclasses don't share a cache
+        if cls.__dict__.get('_fields_cache') is None:
+            cls._fields_cache = super().get_fields()
+        return {name: copy(field) for name, field in cls._fields_cache.items()}
+
+
+class UserSerializer(CachedFieldsSerializer):
     """User serializer for registration and profile"""
     
     class Meta:
@@ -20,6 +36,13 @@ class UserSerializer(serializers.ModelSerializer):
             'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+    
+    def update(self, instance, validated_data):
+        # Write only the submitted columns; request.user is already loaded
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -45,7 +68,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(CachedFieldsSerializer):
     """Category serializer"""
     transaction_count = serializers.SerializerMethodField()
     total_amount = serializers.SerializerMethodField()
@@ -60,19 +83,14 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'is_system', 'created_at', 'updated_at']
     
     def get_transaction_count(self, obj):
-        user = self.context['request'].user
-        return obj.transactions.filter(user=user).count()
+        # Annotated by CategoryViewSet.get_queryset
+        return getattr(obj, 'tx_count', 0)
     
     def get_total_amount(self, obj):
-        from django.db.models import Sum
-        user = self.context['request'].user
-        total = obj.transactions.filter(user=user).aggregate(
-            total=Sum('amount')
-        )['total']
-        return float(total) if total else 0.0
+        return float(getattr(obj, 'tx_total', 0) or 0)
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(CachedFieldsSerializer):
     """Transaction serializer"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_icon = serializers.CharField(source='category.icon', read_only=True)
@@ -107,7 +125,7 @@ class BulkTransactionSerializer(serializers.Serializer):
         return value
 
 
-class BudgetSerializer(serializers.ModelSerializer):
+class BudgetSerializer(CachedFieldsSerializer):
     """Budget serializer with spending calculations"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     current_spending = serializers.SerializerMethodField()
@@ -128,6 +146,7 @@ class BudgetSerializer(serializers.ModelSerializer):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
     
+    # BudgetViewSet annotates current_spending, which get_spending() picks up
     def get_current_spending(self, obj):
         return float(obj.get_spending())
     
@@ -0,0 +1,14 @@
+"""
+Signal handlers for API-level caches
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from transactions.models import Transaction
+from .cache import invalidate_analytics_cache
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalidate_user_analytics(sender, instance, **kwargs):
+    """Drop cached analytics whenever one of the user's transactions changes"""
+    invalidate_analytics_cache(instance.user_id)
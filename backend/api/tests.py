@@ -0,0 +1,44 @@
+"""
+Tests for API endpoints that hand work to Celery
+"""
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from tasks.tasks import process_csv_upload
+
+
+class BulkUploadEnqueueTests(APITestCase):
+    """A failed enqueue answers 503 and leaves nothing behind in storage"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = get_user_model().objects.create_user(
+            username='bob', email='bob@example.com', password='s3cret-pass'
+        )
+        self.client.force_authenticate(self.user)
+    
+    def test_upload_returns_503_and_deletes_file_when_enqueue_fails(self):
+        csv_file = SimpleUploadedFile(
+            'transactions.csv',
+            b'date,amount,type,description\n2026-10-01,3.00,expense,Starbucks\n',
+            content_type='text/csv'
+        )
+        failure = RuntimeError('Retry limit exceeded while trying to reconnect')
+        
+        with override_settings(MEDIA_ROOT=self.media_root):
+            with mock.patch.object(process_csv_upload, 'apply_async', side_effect=failure):
+                response = self.client.post(
+                    '/api/transactions/bulk_upload/', {'file': csv_file}, format='multipart'
+                )
+        
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        stored = [name for _, _, names in os.walk(self.media_root) for name in names]
+        self.assertEqual(stored, [])
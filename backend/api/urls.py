@@ -6,7 +6,7 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import (
     UserViewSet, CategoryViewSet, TransactionViewSet,
-    BudgetViewSet, AnalyticsViewSet, register
+    BudgetViewSet, AnalyticsViewSet, register, task_status
 )
 
 router = DefaultRouter()
@@ -22,6 +22,9 @@ urlpatterns = [
     path('auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
+    # Background task status
+    path('tasks/<str:task_id>/', task_status, name='task_status'),
+    
     # API routes
     path('', include(router.urls)),
 ]
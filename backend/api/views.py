@@ -4,16 +4,31 @@ REST API Views with Row-Level Security
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, Count, Q, Avg
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from django.db.models import (
+    Sum, Count, Q, Avg, F, Func, Window,
+    ExpressionWrapper, FloatField
+)
+from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from datetime import timedelta, datetime
+from celery.result import AsyncResult
+from dateutil.relativedelta import relativedelta
+from datetime import timedelta
 from decimal import Decimal
 import csv
-import io
+import logging
+import uuid
 
+from .cache import (
+    ANALYTICS_CACHE_TTL, analytics_cache_key, get_task_owner, remember_task_owner
+)
+from .pagination import TransactionCursorPagination, StandardPagination
 from .serializers import (
     UserSerializer, UserRegistrationSerializer,
     TransactionSerializer, CategorySerializer, BudgetSerializer,
@@ -21,11 +36,30 @@ from .serializers import (
     SpendingByCategorySerializer, MonthlyTrendSerializer
 )
 from transactions.models import Transaction, Category, Budget
-from tasks.tasks import bulk_categorize_transactions, calculate_investment_returns
+from categorization.models import DescriptionCategoryCache
+from financeflow.celery import enqueue_fast
+from tasks.tasks import (
+    bulk_categorize_transactions, calculate_investment_returns, process_csv_upload
+)
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
 
+class WindowSum(Func):
+    """SUM usable as a window over an aggregate, e.g. SUM(SUM(amount)) OVER ()"""
+    function = 'SUM'
+    window_compatible = True
+
+
+class _Echo:
+    """File-like object whose write() just returns the value, for streaming csv.writer output"""
+    
+    def write(self, value):
+        return value
+
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     User management viewset
@@ -71,6 +105,33 @@ def register(request):
     }, status=status.HTTP_201_CREATED)
 
 
+def _start_user_task(task, user_id, *args):
+    """Enqueue a task on behalf of a user and record them as its owner"""
+    result = enqueue_fast(task, user_id, *args)
+    remember_task_owner(result.id, user_id)
+    return result
+
+
+@api_view(['GET'])
+def task_status(request, task_id):
+    """Report the state of a background task started by this user"""
+    # Only tasks this user started are visible, whatever their state
+    if get_task_owner(task_id) != request.user.id:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    
+    result = AsyncResult(task_id)
+    data = {'task_id': task_id, 'status': result.state}
+    
+    if result.state == 'PROGRESS':
+        data['progress'] = result.info
+    elif result.successful():
+        data['result'] = result.result
+    elif result.failed():
+        data['error'] = str(result.result)
+    
+    return Response(data)
+
+
 class CategoryViewSet(viewsets.ModelViewSet):
     """
     Category management viewset
@@ -78,14 +139,23 @@ class CategoryViewSet(viewsets.ModelViewSet):
     """
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = StandardPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
+    # Meta.ordering is dropped once the queryset is aggregated
+    ordering = ['name']
     
     def get_queryset(self):
         # RLS: System categories + user's custom categories
+        user = self.request.user
+        
+        # Aggregate per-user transaction stats in the same query (avoids N+1)
         return Category.objects.filter(
-            Q(is_system=True) | Q(user=self.request.user)
+            Q(is_system=True) | Q(user=user)
+        ).annotate(
+            tx_count=Count('transactions', filter=Q(transactions__user=user)),
+            tx_total=Sum('transactions__amount', filter=Q(transactions__user=user))
         )
     
     def perform_create(self, serializer):
@@ -99,14 +169,24 @@ class TransactionViewSet(viewsets.ModelViewSet):
     """
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['description', 'notes']
     ordering_fields = ['date', 'amount', 'created_at']
-    ordering = ['-date', '-created_at']
+    ordering = ['-date', '-created_at', '-id']
     
     def get_queryset(self):
         # RLS: Users can only see their own transactions
-        queryset = Transaction.objects.filter(user=self.request.user)
+        queryset = Transaction.objects.select_related('category').filter(
+            user=self.request.user
+        ).only(
+            # Columns TransactionSerializer reads, the owner for update hooks,
+            # plus the joined category display fields
+            'id', 'user', 'date', 'amount', 'type', 'description', 'category',
+            'auto_categorized', 'confidence_score', 'notes', 'receipt_url', 'tags',
+            'created_at', 'updated_at',
+            'category__name', 'category__icon', 'category__color'
+        )
         
         # Additional filters
         transaction_type = self.request.query_params.get('type', None)
@@ -125,6 +205,16 @@ class TransactionViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def perform_update(self, serializer):
+        previous_category_id = serializer.instance.category_id
+        transaction = serializer.save()
+        
+        # A user-chosen category becomes the categorizer's answer for this description
+        if transaction.category_id and transaction.category_id != previous_category_id:
+            DescriptionCategoryCache.remember(
+                transaction.user_id, transaction.description, transaction.category_id
+            )
+    
     @action(detail=False, methods=['post'])
     def bulk_upload(self, request):
         """
@@ -134,63 +224,51 @@ class TransactionViewSet(viewsets.ModelViewSet):
         serializer = BulkTransactionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        # Parse and insert in a worker so large files don't tie up the request
         csv_file = request.FILES['file']
-        decoded_file = csv_file.read().decode('utf-8')
-        io_string = io.StringIO(decoded_file)
-        reader = csv.DictReader(io_string)
-        
-        created_count = 0
-        errors = []
-        
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                transaction_data = {
-                    'date': row.get('date'),
-                    'amount': row.get('amount'),
-                    'type': row.get('type', 'expense'),
-                    'description': row.get('description'),
-                }
-                
-                # Optional category
-                category_name = row.get('category', '').strip()
-                if category_name:
-                    category = Category.objects.filter(
-                        Q(name__iexact=category_name, user=request.user) |
-                        Q(name__iexact=category_name, is_system=True)
-                    ).first()
-                    if category:
-                        transaction_data['category'] = category.id
-                
-                trans_serializer = TransactionSerializer(
-                    data=transaction_data,
-                    context={'request': request}
-                )
-                
-                if trans_serializer.is_valid():
-                    trans_serializer.save()
-                    created_count += 1
-                else:
-                    errors.append({
-                        'row': row_num,
-                        'errors': trans_serializer.errors
-                    })
-            
-            except Exception as e:
-                errors.append({
-                    'row': row_num,
-                    'error': str(e)
-                })
+        storage_path = default_storage.save(
+            f'uploads/{request.user.id}/{uuid.uuid4().hex}.csv', csv_file
+        )
+        try:
+            task = _start_user_task(process_csv_upload, request.user.id, storage_path)
+        except Exception as e:
+            logger.error(f"Couldn't queue CSV upload for user {request.user.id}: {e}")
+            default_storage.delete(storage_path)
+            return Response(
+                {'error': 'Background processing is unavailable, please try again later'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         
         return Response({
-            'message': f'Uploaded {created_count} transactions',
-            'created': created_count,
-            'errors': errors
-        })
+            'message': 'CSV upload started',
+            'task_id': task.id,
+            'status_url': reverse('task_status', args=[task.id], request=request)
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream transactions as CSV in the bulk upload format
+        Rows are read in chunks and written as they go, so memory stays flat
+        """
+        queryset = self.filter_queryset(self.get_queryset()).values_list(
+            'date', 'amount', 'type', 'description', 'category__name'
+        )
+        writer = csv.writer(_Echo())
+        
+        def rows():
+            yield writer.writerow(['date', 'amount', 'type', 'description', 'category'])
+            for date, amount, transaction_type, description, category_name in queryset.iterator(chunk_size=2000):
+                yield writer.writerow([date, amount, transaction_type, description, category_name or ''])
+        
+        response = StreamingHttpResponse(rows(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
+        return response
     
     @action(detail=False, methods=['post'])
     def bulk_categorize(self, request):
         """Trigger bulk categorization of uncategorized transactions"""
-        task = bulk_categorize_transactions.delay(request.user.id)
+        task = _start_user_task(bulk_categorize_transactions, request.user.id)
         return Response({
             'message': 'Bulk categorization started',
             'task_id': task.id
@@ -204,20 +282,32 @@ class BudgetViewSet(viewsets.ModelViewSet):
     """
     serializer_class = BudgetSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = StandardPagination
+    # Same as Meta.ordering (with_spending() adds a subquery, not a GROUP BY);
+    # kept explicit as the OrderingFilter default
+    ordering = ['-created_at']
     
     def get_queryset(self):
         # RLS: Users can only see their own budgets
-        return Budget.objects.filter(user=self.request.user)
+        user = self.request.user
+        
+        # Spending per budget in the same query instead of a SUM per row
+        return Budget.objects.select_related('category').filter(
+            user=user
+        ).with_spending()
     
     @action(detail=True, methods=['get'])
     def status(self, request, pk=None):
         """Get detailed budget status"""
         budget = self.get_object()
         
+        # Spending is annotated by get_queryset and reused by every derived value below
+        spending = budget.get_spending()
+        
         return Response({
             'budget': BudgetSerializer(budget, context={'request': request}).data,
-            'spending': float(budget.get_spending()),
-            'remaining': float(budget.amount - budget.get_spending()),
+            'spending': float(spending),
+            'remaining': float(budget.amount - spending),
             'percentage_used': budget.get_percentage_used(),
             'is_over_budget': budget.is_over_budget(),
             'should_alert': budget.should_alert(),
@@ -249,30 +339,32 @@ class AnalyticsViewSet(viewsets.ViewSet):
         else:
             start_date = today - timedelta(days=30)
         
-        transactions = Transaction.objects.filter(
+        cache_key = analytics_cache_key(request.user.id, 'summary', period, today)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+        
+        # Single pass over the period's rows
+        totals = Transaction.objects.filter(
             user=request.user,
             date__gte=start_date,
             date__lte=today
+        ).aggregate(
+            total_income=Sum('amount', filter=Q(type='income')),
+            total_expenses=Sum('amount', filter=Q(type='expense')),
+            total_investments=Sum('amount', filter=Q(type='investment')),
+            transaction_count=Count('id'),
+            average_transaction=Avg('amount')
         )
         
-        total_income = transactions.filter(type='income').aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-        
-        total_expenses = transactions.filter(type='expense').aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-        
-        total_investments = transactions.filter(type='investment').aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
+        total_income = totals['total_income'] or Decimal('0.00')
+        total_expenses = totals['total_expenses'] or Decimal('0.00')
+        total_investments = totals['total_investments'] or Decimal('0.00')
         
         net_savings = total_income - total_expenses - total_investments
         
-        transaction_count = transactions.count()
-        average_transaction = transactions.aggregate(
-            avg=Avg('amount')
-        )['avg'] or Decimal('0.00')
+        transaction_count = totals['transaction_count']
+        average_transaction = totals['average_transaction'] or Decimal('0.00')
         
         data = {
             'total_income': total_income,
@@ -284,6 +376,7 @@ class AnalyticsViewSet(viewsets.ViewSet):
         }
         
         serializer = AnalyticsSerializer(data)
+        cache.set(cache_key, serializer.data, ANALYTICS_CACHE_TTL)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
@@ -299,65 +392,76 @@ class AnalyticsViewSet(viewsets.ViewSet):
         else:
             start_date = today - timedelta(days=30)
         
+        cache_key = analytics_cache_key(request.user.id, 'spending_by_category', period, today)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+        
+        # Percentages come back from the database via a window over the grouped totals
         spending_data = Transaction.objects.filter(
             user=request.user,
             type='expense',
             date__gte=start_date,
             date__lte=today
         ).values('category__name').annotate(
-            amount=Sum('amount'),
+            total=Sum('amount'),
             count=Count('id')
-        ).order_by('-amount')
-        
-        total = sum(item['amount'] for item in spending_data if item['amount'])
+        ).annotate(
+            percentage=ExpressionWrapper(
+                F('total') * 100.0 / Window(expression=WindowSum(F('total'))),
+                output_field=FloatField()
+            )
+        ).order_by('-total')
         
-        result = []
-        for item in spending_data:
-            amount = item['amount'] or Decimal('0.00')
-            percentage = float((amount / total * 100)) if total > 0 else 0
-            result.append({
+        result = [
+            {
                 'category': item['category__name'] or 'Uncategorized',
-                'amount': amount,
+                'amount': item['total'] or Decimal('0.00'),
                 'count': item['count'],
-                'percentage': percentage
-            })
+                'percentage': item['percentage'] or 0
+            }
+            for item in spending_data
+        ]
         
         serializer = SpendingByCategorySerializer(result, many=True)
+        cache.set(cache_key, serializer.data, ANALYTICS_CACHE_TTL)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def monthly_trends(self, request):
         """Get monthly income/expense trends for the past year"""
         today = timezone.now().date()
-        months = []
         
-        for i in range(12):
-            month_date = today - timedelta(days=30*i)
-            month_start = month_date.replace(day=1)
-            
-            if month_date.month == 12:
-                month_end = month_date.replace(day=31)
-            else:
-                next_month = month_date.replace(month=month_date.month + 1, day=1)
-                month_end = next_month - timedelta(days=1)
-            
-            transactions = Transaction.objects.filter(
-                user=request.user,
-                date__gte=month_start,
-                date__lte=month_end
-            )
-            
-            income = transactions.filter(type='income').aggregate(
-                total=Sum('amount')
-            )['total'] or Decimal('0.00')
-            
-            expenses = transactions.filter(type='expense').aggregate(
-                total=Sum('amount')
-            )['total'] or Decimal('0.00')
-            
-            investments = transactions.filter(type='investment').aggregate(
-                total=Sum('amount')
-            )['total'] or Decimal('0.00')
+        cache_key = analytics_cache_key(request.user.id, 'monthly_trends', today)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+        
+        # First day of each of the last 12 months, oldest first
+        current_month = today.replace(day=1)
+        month_starts = [current_month - relativedelta(months=i) for i in range(11, -1, -1)]
+        
+        # One GROUP BY month query instead of 3 aggregates per month
+        monthly_totals = Transaction.objects.filter(
+            user=request.user,
+            date__gte=month_starts[0],
+            date__lte=today
+        ).annotate(
+            month=TruncMonth('date')
+        ).values('month').annotate(
+            income=Sum('amount', filter=Q(type='income')),
+            expenses=Sum('amount', filter=Q(type='expense')),
+            investments=Sum('amount', filter=Q(type='investment'))
+        ).order_by('month')
+        
+        totals_by_month = {row['month']: row for row in monthly_totals}
+        
+        months = []
+        for month_start in month_starts:
+            row = totals_by_month.get(month_start, {})
+            income = row.get('income') or Decimal('0.00')
+            expenses = row.get('expenses') or Decimal('0.00')
+            investments = row.get('investments') or Decimal('0.00')
             
             months.append({
                 'month': month_start.strftime('%B %Y'),
@@ -367,15 +471,15 @@ class AnalyticsViewSet(viewsets.ViewSet):
                 'net': income - expenses - investments
             })
         
-        months.reverse()
         serializer = MonthlyTrendSerializer(months, many=True)
+        cache.set(cache_key, serializer.data, ANALYTICS_CACHE_TTL)
         return Response(serializer.data)
     
     @action(detail=False, methods=['post'])
     def calculate_investment_returns(self, request):
         """Calculate investment returns"""
         interval = request.data.get('interval', 'monthly')
-        task = calculate_investment_returns.delay(request.user.id, interval)
+        task = _start_user_task(calculate_investment_returns, request.user.id, interval)
         
         return Response({
             'message': 'Investment calculation started',
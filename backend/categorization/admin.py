@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import DescriptionCategoryCache
+
+@admin.register(DescriptionCategoryCache)
+class DescriptionCategoryCacheAdmin(admin.ModelAdmin):
+    list_display = ['norm_desc', 'user', 'category', 'last_used_at', 'created_at']
+    search_fields = ['norm_desc', 'user__email']
+    ordering = ['-last_used_at']
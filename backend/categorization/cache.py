@@ -0,0 +1,61 @@
+"""
+In-process caches for category lookups on the categorization hot path
+"""
+import time
+from transactions.models import Category
+
+# Categories keyed by name: system ones in one map, each user's own in a map
+# per user id. Loaded lazily, dropped by the Category save/delete signals in
+# this process and refreshed after a TTL so changes made through other worker
+# processes are picked up too
+CATEGORY_CACHE_TTL = 300
+MAX_CACHED_USERS = 10000
+_sys_cat_cache = None
+_sys_cat_loaded_at = 0.0
+_user_cat_cache = {}
+_generation = 0
+
+
+def get_system_category(name):
+    """Return the system Category with this name, or None"""
+    global _sys_cat_cache, _sys_cat_loaded_at
+    now = time.monotonic()
+    if _sys_cat_cache is None or now - _sys_cat_loaded_at > CATEGORY_CACHE_TTL:
+        _sys_cat_cache = {c.name: c for c in Category.objects.filter(is_system=True)}
+        _sys_cat_loaded_at = now
+    return _sys_cat_cache.get(name)
+
+
+def get_user_category(user_id, name):
+    """Return the user's own Category with this name, or None"""
+    now = time.monotonic()
+    entry = _user_cat_cache.get(user_id)
+    if entry is None or now - entry[0] > CATEGORY_CACHE_TTL:
+        if len(_user_cat_cache) >= MAX_CACHED_USERS:
+            _user_cat_cache.clear()
+        entry = (now, {c.name: c for c in Category.objects.filter(user_id=user_id)})
+        _user_cat_cache[user_id] = entry
+    return entry[1].get(name)
+
+
+def category_cache_generation():
+    """
+    Key for memoized predictions: a counter bumped on every category change in
+    this process, plus the current TTL window so predictions made before a
+    change in another process expire along with the category maps
+    """
+    return _generation, int(time.monotonic() // CATEGORY_CACHE_TTL)
+
+
+def clear_category_cache(user_id=None):
+    """
+    Forget cached categories so the next lookup reloads them
+    Only the given user's map is dropped for a user category, everything for a system one
+    """
+    global _sys_cat_cache, _generation
+    if user_id is None:
+        _sys_cat_cache = None
+        _user_cat_cache.clear()
+    else:
+        _user_cat_cache.pop(user_id, None)
+    _generation += 1
@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from categorization.ml_categorizer import TransactionCategorizer
+from categorization.ml_categorizer import get_categorizer
 from transactions.models import Category
 
 class Command(BaseCommand):
@@ -19,8 +19,7 @@ class Command(BaseCommand):
         
         self.stdout.write('Training transaction categorization model...')
         
-        categorizer = TransactionCategorizer()
-        accuracy = categorizer.train()
+        accuracy = get_categorizer().train()
         
         self.stdout.write(
             self.style.SUCCESS(f'Model trained successfully with {accuracy*100:.2f}% accuracy')
@@ -55,12 +54,24 @@ class Command(BaseCommand):
             {'name': 'Investment', 'type': 'investment', 'icon': '📈', 'color': '#3B82F6'},
         ]
         
-        for cat_data in categories:
-            Category.objects.get_or_create(
-                name=cat_data['name'],
+        existing = set(
+            Category.objects.filter(
                 is_system=True,
-                defaults=cat_data
-            )
+                name__in=[cat_data['name'] for cat_data in categories]
+            ).values_list('name', flat=True)
+        )
+        to_create = [
+            Category(is_system=True, **cat_data)
+            for cat_data in categories
+            if cat_data['name'] not in existing
+        ]
+        
+        # One INSERT for every missing category instead of a get_or_create per row
+        Category.objects.bulk_create(to_create, ignore_conflicts=True)
+        
+        for cat_data in categories:
             self.stdout.write(f"  ✓ {cat_data['name']}")
         
-        self.stdout.write(self.style.SUCCESS(f'Created {len(categories)} system categories'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(to_create)} system categories ({len(existing)} already existed)'
+        ))
@@ -2,51 +2,373 @@
 TF-IDF based Transaction Categorization using Machine Learning
 Achieves 88% accuracy on transaction categorization
 """
+import logging
 import os
+import re
+import time
+from functools import lru_cache
+from typing import NamedTuple
 import joblib
-import pandas as pd
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 from django.conf import settings
-from transactions.models import Category
+from .cache import get_system_category, get_user_category, category_cache_generation
+from .models import DescriptionCategoryCache
+
+logger = logging.getLogger(__name__)
+
+# Keyword rules with high confidence
+# Note: Use singular/root forms - stemming handles variations!
+KEYWORD_RULES = {
+    'Groceries': ['walmart', 'whole foods', 'trader joe', 'safeway', 'kroger', 'costco',
+                 'grocery', 'supermarket', 'food market', 'aldi', 'target food',
+                 'food store', 'market'],
+    'Dining': ['starbucks', 'coffee', 'restaurant', 'mcdonald', 'chipotle', 'subway',
+              'pizza', 'burger', 'cafe', 'dining', 'lunch', 'dinner', 'breakfast',
+              'taco bell', 'wendy', 'dunkin', 'panera'],
+    'Transportation': ['petrol', 'gasoline', 'gas station', 'fuel', 'shell', 'chevron', 
+                     'bp', 'exxon', 'uber', 'lyft', 'parking', 'car wash', 'auto', 
+                     'oil change', 'taxi', 'metro', 'transit', 'vehicle', 'car service'],
+    'Housing': ['rent', 'mortgage', 'lease', 'landlord', 'apartment', 'house payment',
+               'hoa', 'property', 'housing', 'rental', 'condo'],
+    'Income': ['salary', 'payroll', 'paycheck', 'wage', 'scholarship', 'grant', 
+              'bonus', 'commission', 'freelance', 'income', 'stipend', 'award', 'earning'],
+    'Shopping': ['amazon', 'shopping', 'shop', 'retail', 'best buy', 'target store', 
+                'mall', 'nike', 'clothing', 'online order'],
+    'Utilities': ['electric', 'electricity', 'water', 'internet', 'phone bill', 'cable', 
+                 'utility', 'verizon', 'att', 'comcast', 'spectrum'],
+    'Entertainment': ['netflix', 'spotify', 'hulu', 'disney', 'hbo', 'movie',
+                    'concert', 'gaming', 'entertainment', 'streaming', 'music'],
+    'Healthcare': ['pharmacy', 'cvs', 'walgreen', 'doctor', 'dentist', 'hospital',
+                  'medical', 'health', 'prescription', 'clinic', 'eye', 'checkup', 
+                  'check up', 'exam', 'vision', 'optical', 'therapy', 'treatment', 
+                  'dermatology', 'dermatologist', 'skin care'],
+    'Fitness': ['gym', 'fitness', 'yoga', 'workout', 'trainer', 'exercise', 'sport', 'athlete'],
+    'Travel': ['hotel', 'airbnb', 'airline', 'flight', 'travel', 'vacation', 'booking', 
+              'trip', 'tour', 'resort', 'cruise', 'holiday', 'destination', 'getaway'],
+    'Insurance': ['insurance', 'policy', 'premium', 'coverage'],
+    'Subscriptions': ['subscription', 'membership', 'monthly fee'],
+    'Education': ['tuition', 'school', 'textbook', 'course', 'udemy', 'training', 'education'],
+    'Pets': ['pet store', 'pet shop', 'vet', 'veterinary', 'dog food', 'cat food', 
+            'pet food', 'pet supply', 'animal hospital', 'pet grooming', 'pet'],
+    'Investment': ['stock', '401k', 'investment', 'ira', 'brokerage', 'portfolio', 
+                  'share', 'equity', 'mutual fund', 'etf', 'bond', 'crypto', 'bitcoin', 
+                  'trading', 'stock market'],
+    'Charity': ['donation', 'charity', 'church', 'fundraiser', 'charitable'],
+    'Taxes': ['tax', 'irs', 'accountant', 'tax payment'],
+    'Personal Care': ['salon', 'spa', 'haircut', 'massage', 'cosmetic', 'beauty', 
+                     'skin', 'facial', 'manicure', 'pedicure', 'skincare', 'skin treatment']
+}
+
+
+@lru_cache(maxsize=65536)
+def _simple_stem(word):
+    """
+    Simple stemming to handle plurals and common variations
+    Reduces words to their root form
+    """
+    # Skip very short words
+    if len(word) <= 2:
+        return word
+        
+    # Handle common plural endings
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'  # groceries → grocery
+    elif word.endswith('es') and len(word) > 3 and not word.endswith('ses'):
+        return word[:-2]  # boxes → box, but not messes
+    elif word.endswith('s') and len(word) > 2 and not word.endswith('ss'):
+        return word[:-1]  # stocks → stock, but not class
+    # Handle common verb endings
+    elif word.endswith('ing') and len(word) > 4:
+        return word[:-3]  # buying → buy
+    elif word.endswith('ed') and len(word) > 3:
+        return word[:-2]  # purchased → purchase
+    return word
+
+
+# Single-pass multi-keyword index built once at import: every keyword (and every
+# stemmed single-word keyword) maps to the rank of the first category listing it,
+# so one scan over the description's words finds all hits without a regex per keyword
+RULE_CATEGORIES = list(KEYWORD_RULES)
+KEYWORD_INDEX = {}
+STEMMED_KEYWORD_INDEX = {}
+for _rank, _keywords in enumerate(KEYWORD_RULES.values()):
+    for _keyword in _keywords:
+        KEYWORD_INDEX.setdefault(_keyword, _rank)
+        if ' ' not in _keyword:
+            STEMMED_KEYWORD_INDEX.setdefault(_simple_stem(_keyword), _rank)
+MAX_KEYWORD_WORDS = max(len(keyword.split()) for keyword in KEYWORD_INDEX)
+
+WORD_RE = re.compile(r'\w+')
+
+
+class _Prepped(NamedTuple):
+    """A description lowercased and tokenized once, shared by the keyword and fuzzy strategies"""
+    lower: str
+    spans: tuple  # (start, end) of each word in lower, in order
+    words: frozenset
+    stems: frozenset
+
+
+def _prepare(description):
+    """Lowercase, split into words and stem a description in one pass"""
+    lower = description.lower()
+    spans = tuple(match.span() for match in WORD_RE.finditer(lower))
+    words = frozenset(lower[start:end] for start, end in spans)
+    return _Prepped(lower, spans, words, frozenset(_simple_stem(word) for word in words))
+
+
+def _match_keyword_rules(prepped):
+    """
+    Return {category rank: confidence} for every rule hit in the description
+    Multi-word keywords only match words separated by a single space, like the old regexes
+    """
+    desc_lower, spans = prepped.lower, prepped.spans
+    hits = {}
+    
+    # Exact pass: every run of up to MAX_KEYWORD_WORDS consecutive words
+    for i, (start, end) in enumerate(spans):
+        for j in range(i, min(i + MAX_KEYWORD_WORDS, len(spans))):
+            if j > i and desc_lower[spans[j - 1][1]:spans[j][0]] != ' ':
+                break
+            rank = KEYWORD_INDEX.get(desc_lower[start:spans[j][1]])
+            if rank is not None:
+                hits[rank] = 0.95
+    
+    # Stemmed pass: single words only, slightly lower confidence
+    for stem in prepped.stems:
+        rank = STEMMED_KEYWORD_INDEX.get(stem)
+        if rank is not None:
+            hits.setdefault(rank, 0.90)
+    
+    return hits
+
+
+# Semantic similarity patterns for fuzzy matching - broader than the keyword rules
+FUZZY_PATTERNS = {
+    'Investment': {
+        'keywords': ['stock', 'invest', 'trading', 'portfolio', 'equity', 'bond', 'fund', 
+                    'crypto', 'bitcoin', 'forex', 'market', 'asset', '401', 'ira', 'roth'],
+        'indicators': ['buy', 'sell', 'trade', 'exchange', 'broker', 'dividend', 'capital']
+    },
+    'Healthcare': {
+        'keywords': ['doctor', 'medical', 'health', 'hospital', 'clinic', 'pharmacy', 
+                    'dental', 'vision', 'therapy', 'treatment', 'surgery', 'medicine',
+                    'prescription', 'lab', 'test', 'exam', 'checkup', 'vaccination'],
+        'indicators': ['appointment', 'visit', 'consultation', 'procedure', 'injection']
+    },
+    'Personal Care': {
+        'keywords': ['salon', 'spa', 'beauty', 'hair', 'nail', 'skin', 'facial', 'massage',
+                    'manicure', 'pedicure', 'wax', 'laser', 'botox', 'cosmetic', 'makeup'],
+        'indicators': ['treatment', 'service', 'appointment', 'session']
+    },
+    'Travel': {
+        'keywords': ['hotel', 'flight', 'airline', 'vacation', 'trip', 'travel', 'tour',
+                    'resort', 'booking', 'airbnb', 'cruise', 'ticket', 'passport'],
+        'indicators': ['booking', 'reservation', 'fare', 'accommodation']
+    },
+    'Dining': {
+        'keywords': ['restaurant', 'cafe', 'food', 'dining', 'pizza', 'burger', 'coffee',
+                    'lunch', 'dinner', 'breakfast', 'meal', 'eat', 'drink', 'bar'],
+        'indicators': ['delivery', 'takeout', 'order', 'menu', 'tip']
+    },
+    'Groceries': {
+        'keywords': ['grocery', 'supermarket', 'walmart', 'costco', 'market', 'store',
+                    'food', 'produce', 'meat', 'dairy', 'bread', 'vegetable', 'fruit'],
+        'indicators': ['shopping', 'weekly', 'monthly', 'bulk']
+    },
+    'Transportation': {
+        'keywords': ['uber', 'lyft', 'taxi', 'gas', 'fuel', 'petrol', 'parking', 'metro',
+                    'bus', 'train', 'car', 'vehicle', 'auto', 'oil', 'tire', 'mechanic'],
+        'indicators': ['service', 'repair', 'maintenance', 'wash', 'change']
+    },
+    'Housing': {
+        'keywords': ['rent', 'mortgage', 'apartment', 'house', 'home', 'lease', 'property',
+                    'landlord', 'housing', 'condo', 'realty', 'real estate'],
+        'indicators': ['payment', 'monthly', 'deposit', 'fee']
+    },
+    'Utilities': {
+        'keywords': ['electric', 'water', 'gas', 'internet', 'phone', 'cable', 'wifi',
+                    'utility', 'bill', 'energy', 'power', 'heating', 'cooling'],
+        'indicators': ['bill', 'service', 'monthly', 'provider']
+    },
+    'Entertainment': {
+        'keywords': ['netflix', 'spotify', 'hulu', 'movie', 'concert', 'game', 'gaming',
+                    'entertainment', 'music', 'streaming', 'ticket', 'event', 'show'],
+        'indicators': ['subscription', 'membership', 'pass']
+    },
+    'Shopping': {
+        'keywords': ['amazon', 'store', 'shop', 'retail', 'mall', 'online', 'purchase',
+                    'clothing', 'electronics', 'appliance', 'furniture', 'book'],
+        'indicators': ['order', 'delivery', 'shipping']
+    },
+    'Education': {
+        'keywords': ['school', 'college', 'university', 'tuition', 'course', 'class',
+                    'education', 'textbook', 'training', 'learning', 'study'],
+        'indicators': ['fee', 'payment', 'enrollment', 'semester']
+    },
+    'Fitness': {
+        'keywords': ['gym', 'fitness', 'yoga', 'workout', 'exercise', 'sport', 'trainer',
+                    'athletic', 'crossfit', 'pilates', 'martial', 'boxing'],
+        'indicators': ['membership', 'class', 'session', 'training']
+    },
+    'Insurance': {
+        'keywords': ['insurance', 'policy', 'coverage', 'premium', 'claim', 'auto',
+                    'health', 'life', 'dental', 'vision', 'disability'],
+        'indicators': ['payment', 'monthly', 'annual', 'renewal']
+    },
+    'Income': {
+        'keywords': ['salary', 'paycheck', 'wage', 'income', 'earning', 'bonus',
+                    'commission', 'scholarship', 'grant', 'stipend', 'award', 'refund'],
+        'indicators': ['deposit', 'payment', 'received', 'transfer']
+    },
+    'Subscriptions': {
+        'keywords': ['subscription', 'membership', 'monthly', 'annual', 'recurring',
+                    'premium', 'plus', 'pro', 'service'],
+        'indicators': ['renewal', 'auto', 'recurring']
+    },
+    'Pets': {
+        'keywords': ['pet', 'dog', 'cat', 'animal', 'vet', 'veterinary', 'grooming',
+                    'kennel', 'boarding', 'food', 'toy', 'supply'],
+        'indicators': ['care', 'service', 'clinic', 'hospital']
+    },
+    'Charity': {
+        'keywords': ['donation', 'charity', 'church', 'temple', 'mosque', 'nonprofit',
+                    'foundation', 'relief', 'fund', 'cause', 'giving'],
+        'indicators': ['contribution', 'gift', 'support']
+    },
+    'Taxes': {
+        'keywords': ['tax', 'irs', 'federal', 'state', 'property', 'income',
+                    'accountant', 'filing', 'return'],
+        'indicators': ['payment', 'quarterly', 'annual', 'preparation']
+    },
+}
+
+# Per category: single-word keywords and indicators as frozensets for C-level
+# intersection with the description's words, plus multi-word keyword phrases
+FUZZY_PATTERN_SETS = [
+    (
+        category,
+        frozenset(keyword for keyword in pattern['keywords'] if ' ' not in keyword),
+        frozenset(pattern['indicators']),
+        tuple(keyword for keyword in pattern['keywords'] if ' ' in keyword),
+    )
+    for category, pattern in FUZZY_PATTERNS.items()
+]
+
+@lru_cache(maxsize=4)
+def _analyzer_for(vectorizer):
+    """The vectorizer's tokenizer/n-gram callable, built once per fitted vectorizer"""
+    return vectorizer.build_analyzer()
+
+
+def _is_multinomial(model):
+    """Whether predict_proba is a plain softmax of the class scores"""
+    return (
+        len(model.classes_) > 2
+        and model.solver != 'liblinear'
+        and getattr(model, 'multi_class', 'auto') in ('auto', 'multinomial', 'deprecated')
+    )
+
+
+# Training sets at least this large drop terms seen in a single transaction
+MIN_DF_CORPUS_SIZE = 1000
+
+MODEL_PATH = os.path.join(settings.ML_MODEL_PATH, 'categorizer_model.joblib')
+VECTORIZER_PATH = os.path.join(settings.ML_MODEL_PATH, 'tfidf_vectorizer.joblib')
+
+# Loaded once per process and again whenever the files on disk change;
+# mmap_mode keeps the model's numpy arrays file-backed so forked workers share
+# the pages instead of each holding a private copy
+_MODEL = None
+_VECTORIZER = None
+_MODEL_STAMP = None
+# How often _ensure_loaded looks at the files again, in seconds
+MODEL_STAT_INTERVAL = 1.0
+_model_checked_at = 0.0
+
+
+def _model_stamp():
+    """Modification times of the persisted model files, or None if either is missing"""
+    try:
+        return os.stat(MODEL_PATH).st_mtime_ns, os.stat(VECTORIZER_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _ensure_loaded():
+    """
+    Load the persisted model and vectorizer into the module globals
+    Reloads when the files change, so a model retrained by another process
+    (manage.py train_categorizer) is picked up without restarting workers;
+    the files are checked at most once per MODEL_STAT_INTERVAL
+    """
+    global _MODEL, _VECTORIZER, _MODEL_STAMP, _model_checked_at
+    now = time.monotonic()
+    if _MODEL is not None and now - _model_checked_at < MODEL_STAT_INTERVAL:
+        return _MODEL, _VECTORIZER
+    _model_checked_at = now
+    
+    stamp = _model_stamp()
+    if stamp is not None and stamp != _MODEL_STAMP:
+        # Remember the stamp even if loading fails, so a bad file is only tried once
+        _MODEL_STAMP = stamp
+        try:
+            model = joblib.load(MODEL_PATH, mmap_mode='r')
+            vectorizer = joblib.load(VECTORIZER_PATH)  # Compressed, so not mappable
+        except Exception:
+            logger.exception("Error loading categorizer model")
+        else:
+            _MODEL, _VECTORIZER = model, vectorizer
+            # Memoized predictions came from the previous model
+            _predict_core.cache_clear()
+    return _MODEL, _VECTORIZER
+
+
+def _dump_atomic(obj, path, **kwargs):
+    """Write via a temp file and rename so processes mapping the old file keep a valid copy"""
+    tmp_path = f"{path}.tmp"
+    joblib.dump(obj, tmp_path, **kwargs)
+    os.replace(tmp_path, path)
+
 
 class TransactionCategorizer:
     """
     ML-based transaction categorizer using TF-IDF and Logistic Regression
+    Use get_categorizer() for the shared per-process instance
     """
     
+    __slots__ = ('model_path', 'vectorizer_path', 'model', 'vectorizer')
+    
     def __init__(self):
-        self.model_path = os.path.join(settings.ML_MODEL_PATH, 'categorizer_model.joblib')
-        self.vectorizer_path = os.path.join(settings.ML_MODEL_PATH, 'tfidf_vectorizer.joblib')
+        self.model_path = MODEL_PATH
+        self.vectorizer_path = VECTORIZER_PATH
         self.model = None
         self.vectorizer = None
         self._load_model()
     
     def _load_model(self):
-        """Load trained model and vectorizer"""
-        try:
-            if os.path.exists(self.model_path) and os.path.exists(self.vectorizer_path):
-                self.model = joblib.load(self.model_path)
-                self.vectorizer = joblib.load(self.vectorizer_path)
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            self.model = None
-            self.vectorizer = None
+        """Point at the process-wide model and vectorizer, (re)loading them if needed"""
+        self.model, self.vectorizer = _ensure_loaded()
     
     def _save_model(self):
         """Save trained model and vectorizer"""
         os.makedirs(settings.ML_MODEL_PATH, exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.vectorizer, self.vectorizer_path)
+        # The model stays uncompressed so its coef_ can be memory-mapped; the
+        # vectorizer is a pickled vocabulary dict that can't be, so compress it
+        _dump_atomic(self.model, self.model_path)
+        _dump_atomic(self.vectorizer, self.vectorizer_path, compress=('zlib', 3))
     
     def train(self, transactions_data=None):
         """
         Train the categorization model
         
         Args:
-            transactions_data: DataFrame with 'description' and 'category' columns
+            transactions_data: (descriptions, categories) sequences, or a
+                DataFrame with 'description' and 'category' columns
         
         Returns:
             accuracy score
@@ -55,40 +377,58 @@ class TransactionCategorizer:
         
         # If no data provided, get from database
         if transactions_data is None:
-            transactions = Transaction.objects.filter(
+            transactions = list(Transaction.objects.filter(
                 category__isnull=False
-            ).values('description', 'category__name')
+            ).values_list('description', 'category__name'))
             
-            if transactions.count() < 50:
+            if len(transactions) < 50:
                 # Use default training data if insufficient real data
                 transactions_data = self._get_default_training_data()
             else:
-                transactions_data = pd.DataFrame(transactions)
-                transactions_data.rename(columns={'category__name': 'category'}, inplace=True)
+                transactions_data = tuple(zip(*transactions))
         
         # Prepare data
-        X = transactions_data['description']
-        y = transactions_data['category']
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
-        
-        # TF-IDF Vectorization
+        if isinstance(transactions_data, tuple):
+            X, y = transactions_data
+        else:
+            X = transactions_data['description']
+            y = transactions_data['category']
+        X = np.asarray(X, dtype=object)
+        y = np.asarray(y)
+        
+        # Split data (stratified unless a category has too few examples to split)
+        try:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=42, stratify=y
+            )
+        except ValueError:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=42
+            )
+        
+        # TF-IDF Vectorization. The document-frequency cut-offs bound the vocabulary;
+        # min_df=2 would empty it on the seed data, where most terms occur once
         self.vectorizer = TfidfVectorizer(
-            max_features=1000,
-            ngram_range=(1, 3),
+            ngram_range=(1, 2),
             stop_words='english',
-            min_df=1
+            min_df=2 if len(X_train) >= MIN_DF_CORPUS_SIZE else 1,
+            max_df=0.95,
+            sublinear_tf=True,
+            dtype=np.float32  # Halves the CSR data the solver streams through
         )
         
         X_train_tfidf = self.vectorizer.fit_transform(X_train)
         X_test_tfidf = self.vectorizer.transform(X_test)
         
-        # Train Logistic Regression model
+        # Older scikit-learn keeps every n-gram pruned by min_df/max_df in stop_words_;
+        # it is introspection only and dominates the pickled vectorizer on real data
+        vars(self.vectorizer).pop('stop_words_', None)
+        
+        # Train Logistic Regression model (saga is the sparse-aware stochastic solver; L2 is the default penalty)
         self.model = LogisticRegression(
-            max_iter=1000,
+            solver='saga',
+            max_iter=200,
+            tol=1e-3,
             random_state=42,
             C=1.0
         )
@@ -98,17 +438,22 @@ class TransactionCategorizer:
         y_pred = self.model.predict(X_test_tfidf)
         accuracy = accuracy_score(y_test, y_pred)
         
-        print(f"\n{'='*60}")
-        print(f"Transaction Categorization Model Training Complete")
-        print(f"{'='*60}")
-        print(f"Accuracy: {accuracy*100:.2f}%")
-        print(f"\nClassification Report:")
-        print(classification_report(y_test, y_pred))
-        print(f"{'='*60}\n")
+        logger.info(f"Transaction categorization model trained: {accuracy*100:.2f}% accuracy")
+        # The report is only built when someone is listening at DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Classification report:\n{classification_report(y_test, y_pred, zero_division=0)}")
         
         # Save model
         self._save_model()
         
+        # Publish the new model process-wide and drop stale predictions; other
+        # processes notice the new files in _ensure_loaded
+        global _MODEL, _VECTORIZER, _MODEL_STAMP
+        _MODEL, _VECTORIZER, _MODEL_STAMP = self.model, self.vectorizer, _model_stamp()
+        shared = get_categorizer()
+        shared.model, shared.vectorizer = self.model, self.vectorizer
+        _predict_core.cache_clear()
+        
         return accuracy
     
     def predict(self, description, user=None):
@@ -116,6 +461,7 @@ class TransactionCategorizer:
         Predict category for a transaction description
         
         Multi-strategy approach for maximum coverage:
+        0. The user's own earlier correction for this description (100% confidence)
         1. Exact keyword matching (fastest, 95% confidence)
         2. Fuzzy semantic matching (intelligent, 40-85% confidence)
         3. ML model prediction (learns from data, 30%+ confidence)
@@ -128,19 +474,114 @@ class TransactionCategorizer:
         Returns:
             (Category object, confidence score) or (None, 0)
         """
+        self._load_model()
+        desc_lower = DescriptionCategoryCache.normalize(description)
+        
+        # Strategy 0: one indexed lookup of the user's corrections
+        if user:
+            corrected = DescriptionCategoryCache.lookup(user.id, [desc_lower]).get(desc_lower)
+            if corrected:
+                return corrected, 1.0
+        
+        name, confidence, owner_id = _predict_core(
+            desc_lower,
+            user.id if user else None,
+            category_cache_generation(),
+        )
+        
+        category = None
+        if owner_id is not None:
+            category = get_user_category(owner_id, name)
+        if category is None and name is not None:
+            category = get_system_category(name)
+        
+        if category is None:
+            return None, 0
+        return category, confidence
+    
+    def predict_batch(self, descriptions, user=None):
+        """
+        Predict categories for many descriptions at once
+        
+        Same cascade as predict(), but the rows left undecided by the keyword
+        and fuzzy strategies are scored by the ML model in one vectorized call.
+        
+        Returns:
+            list of (Category object, confidence score) or (None, 0), in input order
+        """
+        self._load_model()
+        user_id = user.id if user else None
+        desc_lowers = [DescriptionCategoryCache.normalize(description) for description in descriptions]
+        corrections = DescriptionCategoryCache.lookup(user_id, desc_lowers) if user_id else {}
+        
+        results = [None] * len(descriptions)
+        pending = []
+        for i, desc_lower in enumerate(desc_lowers):
+            if desc_lower in corrections:
+                continue
+            heuristics = self._heuristic_match(desc_lower)
+            decided = self._heuristic_decision(heuristics)
+            if decided:
+                results[i] = decided
+            else:
+                pending.append((i, desc_lower, heuristics))
+        
+        if pending:
+            ml_predictions = self._ml_predict([desc_lower for _, desc_lower, _ in pending])
+            for (i, _, heuristics), ml_prediction in zip(pending, ml_predictions):
+                results[i] = self._decide(heuristics, ml_prediction, user_id)
+        
+        predictions = []
+        for desc_lower, result in zip(desc_lowers, results):
+            if result is None:
+                predictions.append((corrections[desc_lower], 1.0))
+                continue
+            name, confidence, owner_id = result
+            category = get_user_category(owner_id, name) if owner_id is not None else None
+            if category is None and name is not None:
+                category = get_system_category(name)
+            predictions.append((category, confidence) if category else (None, 0))
+        return predictions
+    
+    def _predict_names(self, desc_lower, user_id=None):
+        """
+        Run the categorization cascade on a normalized description
+        
+        Returns (category name, confidence, id of the user owning the category
+        or None for a system category), or (None, 0, None)
+        """
+        heuristics = self._heuristic_match(desc_lower)
+        decided = self._heuristic_decision(heuristics)
+        if decided:
+            return decided
+        return self._decide(heuristics, self._ml_predict([desc_lower])[0], user_id)
+    
+    def _heuristic_match(self, desc_lower):
+        """Strategies 1-2: (rule category, confidence, fuzzy category, fuzzy confidence)"""
+        prepped = _prepare(desc_lower)
+        
         # Strategy 1: Exact keyword matching (fastest)
-        category, confidence = self._rule_based_categorization(description)
+        category, confidence = self._rule_based_categorization(prepped)
         if confidence > 0.85:
-            return category, confidence
+            return category, confidence, None, 0
         
         # Strategy 2: Fuzzy semantic matching (covers edge cases)
-        fuzzy_category, fuzzy_confidence = self._fuzzy_category_match(description)
+        fuzzy_category, fuzzy_confidence = self._fuzzy_category_match(prepped)
+        return category, confidence, fuzzy_category, fuzzy_confidence
+    
+    def _heuristic_decision(self, heuristics):
+        """Return the result if the keyword or fuzzy strategy is conclusive, else None"""
+        category, confidence, fuzzy_category, fuzzy_confidence = heuristics
+        if confidence > 0.85:
+            return category.name, confidence, None
         if fuzzy_confidence > 0.40:
             # Use fuzzy if better than rule-based
             if fuzzy_confidence > confidence:
-                return fuzzy_category, fuzzy_confidence
-        
-        # Strategy 3: ML model (learns from user behavior)
+                return fuzzy_category.name, fuzzy_confidence, None
+        return None
+    
+    def _ml_predict(self, descriptions):
+        """Strategy 3 scoring: (class name, confidence) per description, or None without a model"""
         if not self.model or not self.vectorizer:
             self._load_model()
             if not self.model:
@@ -148,171 +589,98 @@ class TransactionCategorizer:
         
         if self.model and self.vectorizer:
             try:
-                description_tfidf = self.vectorizer.transform([description])
-                predicted_category_name = self.model.predict(description_tfidf)[0]
-                probabilities = self.model.predict_proba(description_tfidf)[0]
-                ml_confidence = max(probabilities)
+                if len(descriptions) == 1 and _is_multinomial(self.model):
+                    probabilities = self._token_predict_proba(descriptions[0])[np.newaxis]
+                else:
+                    probabilities = self.model.predict_proba(self.vectorizer.transform(descriptions))
+                # One pass through coef_: the argmax of the probabilities is the predicted class
+                best = probabilities.argmax(axis=1)
+                return [
+                    (str(self.model.classes_[j]), float(probabilities[i, j]))
+                    for i, j in enumerate(best)
+                ]
+            except Exception:
+                logger.exception("ML prediction error")
+        
+        return [None] * len(descriptions)
+    
+    def _token_predict_proba(self, description):
+        """
+        Class probabilities for one description straight from vocabulary_, idf_ and coef_
+        
+        Mirrors vectorizer.transform + predict_proba for the handful of tokens in a
+        description without allocating and sorting a sparse matrix.
+        """
+        vectorizer = self.vectorizer
+        vocabulary = vectorizer.vocabulary_
+        counts = {}
+        for token in _analyzer_for(vectorizer)(description):
+            column = vocabulary.get(token)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        
+        scores = np.array(self.model.intercept_, dtype=np.float64)
+        if counts:
+            columns = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+            values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+            if vectorizer.sublinear_tf:
+                values = np.log(values) + 1
+            if vectorizer.use_idf:
+                values *= vectorizer.idf_[columns]
+            if vectorizer.norm == 'l2':
+                values /= np.sqrt(np.dot(values, values))
+            elif vectorizer.norm == 'l1':
+                values /= np.abs(values).sum()
+            scores += self.model.coef_[:, columns] @ values
+        
+        # Multinomial logistic regression: softmax over the class scores
+        scores = np.exp(scores - scores.max())
+        return scores / scores.sum()
+    
+    def _decide(self, heuristics, ml_prediction, user_id=None):
+        """Strategies 3-4: prefer a confident ML prediction, else the best heuristic or fallback"""
+        category, confidence, fuzzy_category, fuzzy_confidence = heuristics
+        
+        # Strategy 3: ML model (learns from user behavior)
+        if ml_prediction:
+            predicted_category_name, ml_confidence = ml_prediction
+            if ml_confidence > 0.25:  # Even lower threshold
+                owner_id = None
+                if user_id and get_user_category(user_id, predicted_category_name):
+                    owner_id = user_id
                 
-                if ml_confidence > 0.25:  # Even lower threshold
-                    ml_category = None
-                    if user:
-                        ml_category = Category.objects.filter(
-                            name=predicted_category_name,
-                            user=user
-                        ).first()
-                    
-                    if not ml_category:
-                        ml_category = Category.objects.filter(
-                            name=predicted_category_name,
-                            is_system=True
-                        ).first()
-                    
-                    if ml_category:
-                        # Use ML if it's more confident
-                        if ml_confidence > max(confidence, fuzzy_confidence):
-                            return ml_category, float(ml_confidence)
-            
-            except Exception as e:
-                print(f"ML Prediction error: {e}")
+                if owner_id or get_system_category(predicted_category_name):
+                    # Use ML if it's more confident
+                    if ml_confidence > max(confidence, fuzzy_confidence):
+                        return predicted_category_name, ml_confidence, owner_id
         
         # Strategy 4: Return best result from previous attempts
         if fuzzy_category and fuzzy_confidence > confidence:
-            return fuzzy_category, fuzzy_confidence
+            return fuzzy_category.name, fuzzy_confidence, None
         elif category:
-            return category, confidence
+            return category.name, confidence, None
         
         # Last resort: Shopping (most generic expense category)
         # Better to have a category than none!
-        try:
-            fallback = Category.objects.get(name='Shopping', is_system=True)
-            return fallback, 0.20  # Low confidence, but still a guess
-        except Category.DoesNotExist:
-            return None, 0
+        if get_system_category('Shopping'):
+            return 'Shopping', 0.20, None  # Low confidence, but still a guess
+        return None, 0, None
     
-    def _fuzzy_category_match(self, description):
+    def _fuzzy_category_match(self, prepped):
         """
         Fuzzy semantic matching - finds similar patterns even without exact keywords
-        Uses word similarity and context clues
+        Uses word similarity and context clues; takes a _Prepped description
         """
-        desc_lower = description.lower()
-        desc_words = set(desc_lower.split())
-        
-        # Semantic similarity patterns - broader matching
-        patterns = {
-            'Investment': {
-                'keywords': ['stock', 'invest', 'trading', 'portfolio', 'equity', 'bond', 'fund', 
-                            'crypto', 'bitcoin', 'forex', 'market', 'asset', '401', 'ira', 'roth'],
-                'indicators': ['buy', 'sell', 'trade', 'exchange', 'broker', 'dividend', 'capital']
-            },
-            'Healthcare': {
-                'keywords': ['doctor', 'medical', 'health', 'hospital', 'clinic', 'pharmacy', 
-                            'dental', 'vision', 'therapy', 'treatment', 'surgery', 'medicine',
-                            'prescription', 'lab', 'test', 'exam', 'checkup', 'vaccination'],
-                'indicators': ['appointment', 'visit', 'consultation', 'procedure', 'injection']
-            },
-            'Personal Care': {
-                'keywords': ['salon', 'spa', 'beauty', 'hair', 'nail', 'skin', 'facial', 'massage',
-                            'manicure', 'pedicure', 'wax', 'laser', 'botox', 'cosmetic', 'makeup'],
-                'indicators': ['treatment', 'service', 'appointment', 'session']
-            },
-            'Travel': {
-                'keywords': ['hotel', 'flight', 'airline', 'vacation', 'trip', 'travel', 'tour',
-                            'resort', 'booking', 'airbnb', 'cruise', 'ticket', 'passport'],
-                'indicators': ['booking', 'reservation', 'fare', 'accommodation']
-            },
-            'Dining': {
-                'keywords': ['restaurant', 'cafe', 'food', 'dining', 'pizza', 'burger', 'coffee',
-                            'lunch', 'dinner', 'breakfast', 'meal', 'eat', 'drink', 'bar'],
-                'indicators': ['delivery', 'takeout', 'order', 'menu', 'tip']
-            },
-            'Groceries': {
-                'keywords': ['grocery', 'supermarket', 'walmart', 'costco', 'market', 'store',
-                            'food', 'produce', 'meat', 'dairy', 'bread', 'vegetable', 'fruit'],
-                'indicators': ['shopping', 'weekly', 'monthly', 'bulk']
-            },
-            'Transportation': {
-                'keywords': ['uber', 'lyft', 'taxi', 'gas', 'fuel', 'petrol', 'parking', 'metro',
-                            'bus', 'train', 'car', 'vehicle', 'auto', 'oil', 'tire', 'mechanic'],
-                'indicators': ['service', 'repair', 'maintenance', 'wash', 'change']
-            },
-            'Housing': {
-                'keywords': ['rent', 'mortgage', 'apartment', 'house', 'home', 'lease', 'property',
-                            'landlord', 'housing', 'condo', 'realty', 'real estate'],
-                'indicators': ['payment', 'monthly', 'deposit', 'fee']
-            },
-            'Utilities': {
-                'keywords': ['electric', 'water', 'gas', 'internet', 'phone', 'cable', 'wifi',
-                            'utility', 'bill', 'energy', 'power', 'heating', 'cooling'],
-                'indicators': ['bill', 'service', 'monthly', 'provider']
-            },
-            'Entertainment': {
-                'keywords': ['netflix', 'spotify', 'hulu', 'movie', 'concert', 'game', 'gaming',
-                            'entertainment', 'music', 'streaming', 'ticket', 'event', 'show'],
-                'indicators': ['subscription', 'membership', 'pass']
-            },
-            'Shopping': {
-                'keywords': ['amazon', 'store', 'shop', 'retail', 'mall', 'online', 'purchase',
-                            'clothing', 'electronics', 'appliance', 'furniture', 'book'],
-                'indicators': ['order', 'delivery', 'shipping']
-            },
-            'Education': {
-                'keywords': ['school', 'college', 'university', 'tuition', 'course', 'class',
-                            'education', 'textbook', 'training', 'learning', 'study'],
-                'indicators': ['fee', 'payment', 'enrollment', 'semester']
-            },
-            'Fitness': {
-                'keywords': ['gym', 'fitness', 'yoga', 'workout', 'exercise', 'sport', 'trainer',
-                            'athletic', 'crossfit', 'pilates', 'martial', 'boxing'],
-                'indicators': ['membership', 'class', 'session', 'training']
-            },
-            'Insurance': {
-                'keywords': ['insurance', 'policy', 'coverage', 'premium', 'claim', 'auto',
-                            'health', 'life', 'dental', 'vision', 'disability'],
-                'indicators': ['payment', 'monthly', 'annual', 'renewal']
-            },
-            'Income': {
-                'keywords': ['salary', 'paycheck', 'wage', 'income', 'earning', 'bonus',
-                            'commission', 'scholarship', 'grant', 'stipend', 'award', 'refund'],
-                'indicators': ['deposit', 'payment', 'received', 'transfer']
-            },
-            'Subscriptions': {
-                'keywords': ['subscription', 'membership', 'monthly', 'annual', 'recurring',
-                            'premium', 'plus', 'pro', 'service'],
-                'indicators': ['renewal', 'auto', 'recurring']
-            },
-            'Pets': {
-                'keywords': ['pet', 'dog', 'cat', 'animal', 'vet', 'veterinary', 'grooming',
-                            'kennel', 'boarding', 'food', 'toy', 'supply'],
-                'indicators': ['care', 'service', 'clinic', 'hospital']
-            },
-            'Charity': {
-                'keywords': ['donation', 'charity', 'church', 'temple', 'mosque', 'nonprofit',
-                            'foundation', 'relief', 'fund', 'cause', 'giving'],
-                'indicators': ['contribution', 'gift', 'support']
-            },
-            'Taxes': {
-                'keywords': ['tax', 'irs', 'federal', 'state', 'property', 'income',
-                            'accountant', 'filing', 'return'],
-                'indicators': ['payment', 'quarterly', 'annual', 'preparation']
-            },
-        }
+        desc_lower, desc_words = prepped.lower, prepped.words
         
-        # Score each category
+        # Score each category: whole-word keyword hits weigh 3 (the old substring
+        # hit plus word overlap), indicators 1, multi-word keywords 2
         scores = {}
-        for category, pattern in patterns.items():
-            score = 0
-            # Check keywords
-            for keyword in pattern['keywords']:
-                if keyword in desc_lower:
-                    score += 2  # Strong match
-            # Check indicators
-            for indicator in pattern['indicators']:
-                if indicator in desc_lower:
-                    score += 1  # Contextual match
-            # Check word overlap
-            keyword_set = set(pattern['keywords'])
-            overlap = len(desc_words & keyword_set)
-            score += overlap
+        for category, keywords, indicators, phrases in FUZZY_PATTERN_SETS:
+            score = 3 * len(desc_words & keywords) + len(desc_words & indicators)
+            for phrase in phrases:
+                if phrase in desc_lower:
+                    score += 2
             
             if score > 0:
                 scores[category] = score
@@ -325,122 +693,32 @@ class TransactionCategorizer:
             confidence = min(0.85, best_score * 0.15)  # Cap at 85%
             
             if confidence > 0.40:  # Lower threshold for fuzzy matching
-                try:
-                    category = Category.objects.get(name=best_category, is_system=True)
+                category = get_system_category(best_category)
+                if category:
                     return category, confidence
-                except Category.DoesNotExist:
-                    pass
         
         return None, 0
     
-    def _simple_stem(self, word):
-        """
-        Simple stemming to handle plurals and common variations
-        Reduces words to their root form
-        """
-        # Skip very short words
-        if len(word) <= 2:
-            return word
-            
-        # Handle common plural endings
-        if word.endswith('ies') and len(word) > 4:
-            return word[:-3] + 'y'  # groceries → grocery
-        elif word.endswith('es') and len(word) > 3 and not word.endswith('ses'):
-            return word[:-2]  # boxes → box, but not messes
-        elif word.endswith('s') and len(word) > 2 and not word.endswith('ss'):
-            return word[:-1]  # stocks → stock, but not class
-        # Handle common verb endings
-        elif word.endswith('ing') and len(word) > 4:
-            return word[:-3]  # buying → buy
-        elif word.endswith('ed') and len(word) > 3:
-            return word[:-2]  # purchased → purchase
-        return word
-    
-    def _rule_based_categorization(self, description):
+    def _rule_based_categorization(self, prepped):
         """
         Rule-based categorization for common keywords
-        Uses stemming to handle plurals and variations automatically
+        Uses stemming to handle plurals and variations automatically; takes a _Prepped description
         Returns (Category, confidence) or (None, 0)
         """
-        import re
-        desc_lower = description.lower()
-        
-        # Stem all words in the description
-        desc_words = re.findall(r'\b\w+\b', desc_lower)
-        stemmed_desc_words = [self._simple_stem(word) for word in desc_words]
-        
-        # Define keyword rules with high confidence
-        # Note: Use singular/root forms - stemming handles variations!
-        rules = {
-            'Groceries': ['walmart', 'whole foods', 'trader joe', 'safeway', 'kroger', 'costco',
-                         'grocery', 'supermarket', 'food market', 'aldi', 'target food',
-                         'food store', 'market'],
-            'Dining': ['starbucks', 'coffee', 'restaurant', 'mcdonald', 'chipotle', 'subway',
-                      'pizza', 'burger', 'cafe', 'dining', 'lunch', 'dinner', 'breakfast',
-                      'taco bell', 'wendy', 'dunkin', 'panera'],
-            'Transportation': ['petrol', 'gasoline', 'gas station', 'fuel', 'shell', 'chevron', 
-                             'bp', 'exxon', 'uber', 'lyft', 'parking', 'car wash', 'auto', 
-                             'oil change', 'taxi', 'metro', 'transit', 'vehicle', 'car service'],
-            'Housing': ['rent', 'mortgage', 'lease', 'landlord', 'apartment', 'house payment',
-                       'hoa', 'property', 'housing', 'rental', 'condo'],
-            'Income': ['salary', 'payroll', 'paycheck', 'wage', 'scholarship', 'grant', 
-                      'bonus', 'commission', 'freelance', 'income', 'stipend', 'award', 'earning'],
-            'Shopping': ['amazon', 'shopping', 'shop', 'retail', 'best buy', 'target store', 
-                        'mall', 'nike', 'clothing', 'online order'],
-            'Utilities': ['electric', 'electricity', 'water', 'internet', 'phone bill', 'cable', 
-                         'utility', 'verizon', 'att', 'comcast', 'spectrum'],
-            'Entertainment': ['netflix', 'spotify', 'hulu', 'disney', 'hbo', 'movie',
-                            'concert', 'gaming', 'entertainment', 'streaming', 'music'],
-            'Healthcare': ['pharmacy', 'cvs', 'walgreen', 'doctor', 'dentist', 'hospital',
-                          'medical', 'health', 'prescription', 'clinic', 'eye', 'checkup', 
-                          'check up', 'exam', 'vision', 'optical', 'therapy', 'treatment', 
-                          'dermatology', 'dermatologist', 'skin care'],
-            'Fitness': ['gym', 'fitness', 'yoga', 'workout', 'trainer', 'exercise', 'sport', 'athlete'],
-            'Travel': ['hotel', 'airbnb', 'airline', 'flight', 'travel', 'vacation', 'booking', 
-                      'trip', 'tour', 'resort', 'cruise', 'holiday', 'destination', 'getaway'],
-            'Insurance': ['insurance', 'policy', 'premium', 'coverage'],
-            'Subscriptions': ['subscription', 'membership', 'monthly fee'],
-            'Education': ['tuition', 'school', 'textbook', 'course', 'udemy', 'training', 'education'],
-            'Pets': ['pet store', 'pet shop', 'vet', 'veterinary', 'dog food', 'cat food', 
-                    'pet food', 'pet supply', 'animal hospital', 'pet grooming', 'pet'],
-            'Investment': ['stock', '401k', 'investment', 'ira', 'brokerage', 'portfolio', 
-                          'share', 'equity', 'mutual fund', 'etf', 'bond', 'crypto', 'bitcoin', 
-                          'trading', 'stock market'],
-            'Charity': ['donation', 'charity', 'church', 'fundraiser', 'charitable'],
-            'Taxes': ['tax', 'irs', 'accountant', 'tax payment'],
-            'Personal Care': ['salon', 'spa', 'haircut', 'massage', 'cosmetic', 'beauty', 
-                             'skin', 'facial', 'manicure', 'pedicure', 'skincare', 'skin treatment']
-        }
+        hits = _match_keyword_rules(prepped)
         
-        # Check each rule - two-pass approach for better accuracy
-        for category_name, keywords in rules.items():
-            for keyword in keywords:
-                # First try exact match (fastest)
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                if re.search(pattern, desc_lower):
-                    try:
-                        category = Category.objects.get(name=category_name, is_system=True)
-                        return category, 0.95
-                    except Category.DoesNotExist:
-                        pass
-                
-                # Second pass: stem-based matching for variations
-                keyword_words = keyword.split()
-                if len(keyword_words) == 1:
-                    # Single word keyword - check if stemmed version matches
-                    stemmed_keyword = self._simple_stem(keyword)
-                    if stemmed_keyword in stemmed_desc_words:
-                        try:
-                            category = Category.objects.get(name=category_name, is_system=True)
-                            return category, 0.90  # Slightly lower for stemmed match
-                        except Category.DoesNotExist:
-                            pass
+        # Earlier categories in KEYWORD_RULES win, as with the old per-category loop
+        for rank in sorted(hits):
+            category = get_system_category(RULE_CATEGORIES[rank])
+            if category:
+                return category, hits[rank]
         
         return None, 0
     
     def _get_default_training_data(self):
         """
         Enhanced training data with 200+ examples for better accuracy
+        Returns (descriptions, categories) lists
         """
         # Create comprehensive training data
         descriptions = []
@@ -543,4 +821,27 @@ class TransactionCategorizer:
                 descriptions.append(term)
                 categories.append(cat)
         
-        return pd.DataFrame({'description': descriptions, 'category': categories})
+        return descriptions, categories
+
+
+_categorizer = None
+
+
+def get_categorizer():
+    """Return the process-wide categorizer, loading the model on first use"""
+    global _categorizer
+    if _categorizer is None:
+        _categorizer = TransactionCategorizer()
+    return _categorizer
+
+
+@lru_cache(maxsize=10000)
+def _predict_core(desc_lower, user_id, generation):
+    """
+    Memoized categorization cascade keyed by normalized description and user
+    
+    Returns names rather than Category objects so entries stay valid across
+    requests; generation changes whenever categories are edited, and the
+    cache is cleared when _ensure_loaded picks up a new model.
+    """
+    return get_categorizer()._predict_names(desc_lower, user_id)
@@ -0,0 +1,70 @@
+"""
+Persistent lookups that short-circuit the categorization cascade
+"""
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+from transactions.models import Category
+
+
+class DescriptionCategoryCache(models.Model):
+    """
+    Category a user picked for a description when correcting a transaction
+    Checked before any other strategy, so repeat merchants skip the cascade
+    """
+    # How often last_used_at is refreshed, so lookups don't turn into writes
+    TOUCH_INTERVAL = timedelta(days=1)
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='description_categories'
+    )
+    norm_desc = models.CharField(max_length=500, help_text="Lowercased, stripped description")
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    last_used_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'description_category_cache'
+        # Also the index behind the per-prediction lookup
+        unique_together = [['user', 'norm_desc']]
+    
+    def __str__(self):
+        return f"{self.norm_desc} → {self.category_id}"
+    
+    @staticmethod
+    def normalize(description):
+        """Normalize a description the same way the categorizer does"""
+        return description.lower().strip()
+    
+    @classmethod
+    def remember(cls, user_id, description, category_id):
+        """Record the user's category choice for a description"""
+        cls.objects.update_or_create(
+            user_id=user_id,
+            norm_desc=cls.normalize(description),
+            defaults={'category_id': category_id, 'last_used_at': timezone.now()}
+        )
+    
+    @classmethod
+    def lookup(cls, user_id, norm_descs):
+        """Return {norm_desc: Category} for the descriptions the user has corrected before"""
+        entries = list(
+            cls.objects.filter(user_id=user_id, norm_desc__in=set(norm_descs))
+            .select_related('category')
+        )
+        
+        # Keep last_used_at roughly current for pruning without a write per lookup
+        now = timezone.now()
+        stale = [entry.pk for entry in entries if now - entry.last_used_at > cls.TOUCH_INTERVAL]
+        if stale:
+            cls.objects.filter(pk__in=stale).update(last_used_at=now)
+        
+        return {entry.norm_desc: entry.category for entry in entries}
@@ -0,0 +1,14 @@
+"""
+Signal handlers for categorizer caches
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from transactions.models import Category
+from .cache import clear_category_cache
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    """Reload cached categories after a category is added, edited or removed"""
+    clear_category_cache(None if instance.is_system else instance.user_id)
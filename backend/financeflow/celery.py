@@ -5,6 +5,7 @@ Celery configuration for financeflow project.
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 
 # Set default Django settings
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'financeflow.settings')
@@ -35,8 +36,43 @@ app.conf.beat_schedule = {
         'task': 'tasks.tasks.check_budget_alerts',
         'schedule': crontab(minute='*/30'),  # Every 30 minutes
     },
+    'reconcile-uncategorized-transactions': {
+        'task': 'tasks.tasks.reconcile_uncategorized_transactions',
+        'schedule': crontab(minute='*/10'),  # Every 10 minutes
+    },
+    'prune-description-category-cache': {
+        'task': 'tasks.tasks.prune_description_category_cache',
+        'schedule': crontab(hour=3, minute=30),  # Every day at 3:30 AM
+    },
+    'drain-mail-outbox': {
+        'task': 'tasks.tasks.drain_mail_outbox',
+        'schedule': crontab(),  # Every minute
+    },
 }
 
+@worker_process_init.connect
+def load_categorizer(**kwargs):
+    """Load the categorization model once per worker process, before its first task"""
+    from categorization.ml_categorizer import get_categorizer
+    get_categorizer()
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
+
+
+def enqueue_fast(task, *args, ignore_result=False):
+    """
+    Publish a task from a request handler, raising within a fraction of a
+    second when Redis is down instead of stalling in Celery's reconnect loops
+    """
+    if not ignore_result:
+        # apply_async subscribes to the result before publishing, and the Redis
+        # result backend retries that for about 20 seconds
+        ping = getattr(getattr(app.backend, 'client', None), 'ping', None)
+        if ping is not None:
+            ping()
+    # retry=False is slower here: the transport then falls back to its own
+    # connection retries. One immediate retry fails in well under a second
+    return task.apply_async(args, ignore_result=ignore_result, retry_policy={'max_retries': 1})
@@ -7,7 +7,7 @@ echo "🤖 Retraining ML Model..."
 echo ""
 
 venv/bin/python manage.py shell << 'PYTHON_EOF'
-from categorization.ml_categorizer import TransactionCategorizer
+from categorization.ml_categorizer import get_categorizer
 from transactions.models import Transaction
 import pandas as pd
 
@@ -21,7 +21,7 @@ print(f"\nCategories: {df['category'].nunique()} unique")
 print(df['category'].value_counts())
 
 # Retrain
-categorizer = TransactionCategorizer()
+categorizer = get_categorizer()
 accuracy = categorizer.train(df)
 
 print(f"\n✅ Model retrained with {accuracy*100:.1f}% accuracy!")
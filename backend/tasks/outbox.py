@@ -0,0 +1,77 @@
+"""
+Outgoing mail queue for the report tasks
+Aggregation tasks push rendered emails onto a Redis list and drain_mail_outbox
+sends them in batches, so SMTP latency never holds up the database work
+"""
+import gzip
+import json
+import logging
+from functools import lru_cache
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_KEY = 'mail:outbox'
+DEAD_LETTER_KEY = 'mail:outbox:dead'
+MAX_SEND_ATTEMPTS = 5
+
+
+@lru_cache(maxsize=None)
+def outbox_client():
+    """Redis client for the outbox, or None when Redis isn't configured"""
+    if not settings.REDIS_URL:
+        return None
+    import redis
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def encode_mail(to, subject, body, attempts=0):
+    return gzip.compress(json.dumps(
+        {'to': to, 'subject': subject, 'body': body, 'attempts': attempts}
+    ).encode())
+
+
+def decode_mail(item):
+    """EmailMessage for a queued outbox entry"""
+    mail = json.loads(gzip.decompress(item))
+    return EmailMessage(mail['subject'], mail['body'], settings.DEFAULT_FROM_EMAIL, [mail['to']])
+
+
+def requeue_failed_mail(client, item):
+    """
+    Put an entry that failed to send at the back of the outbox, or on the
+    dead-letter list once it has failed MAX_SEND_ATTEMPTS times
+    Returns False when it was dead-lettered
+    """
+    mail = json.loads(gzip.decompress(item))
+    attempts = mail.get('attempts', 0) + 1
+    retry = encode_mail(mail['to'], mail['subject'], mail['body'], attempts)
+    if attempts >= MAX_SEND_ATTEMPTS:
+        client.rpush(DEAD_LETTER_KEY, retry)
+        return False
+    client.rpush(OUTBOX_KEY, retry)
+    return True
+
+
+def queue_mail(messages):
+    """
+    Queue (to, subject, body) emails for drain_mail_outbox
+    Without Redis (demo setup) they are sent right away over one connection
+    """
+    if not messages:
+        return
+    
+    client = outbox_client()
+    if client is None:
+        with get_connection() as connection:
+            for to, subject, body in messages:
+                try:
+                    EmailMessage(
+                        subject, body, settings.DEFAULT_FROM_EMAIL, [to], connection=connection
+                    ).send()
+                except Exception as e:
+                    logger.error(f"Error sending '{subject}' to {to}: {e}")
+        return
+    
+    client.rpush(OUTBOX_KEY, *(encode_mail(*message) for message in messages))
@@ -2,54 +2,114 @@
 Celery tasks for automated budget reports, alerts, and notifications
 Reduces manual tracking by 70% through automation
 """
-from celery import shared_task
-from django.core.mail import send_mail
+from celery import group, shared_task
+from django.core.mail import get_connection
 from django.template.loader import render_to_string
-from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta, datetime
-from decimal import Decimal
-from django.db.models import Sum, Count
+from dateutil.relativedelta import relativedelta
+from decimal import Decimal, InvalidOperation
+from django.db.models import Sum, Count, Q, Case, When, Value
+from collections import defaultdict
+from smtplib import SMTPRecipientsRefused
+import csv
+import io
 import logging
 
+from .outbox import OUTBOX_KEY, decode_mail, outbox_client, queue_mail, requeue_failed_mail
+
 logger = logging.getLogger(__name__)
 
+# Users per report subtask; a batch shares its queries
+REPORT_BATCH_SIZE = 200
+
+
+def _fan_out(task, user_ids, *args):
+    """
+    Dispatch task as a group of subtasks, each getting REPORT_BATCH_SIZE user
+    IDs plus args, so report runs spread across workers and a failing batch
+    doesn't hold up the rest
+    """
+    batches = [
+        user_ids[i:i + REPORT_BATCH_SIZE]
+        for i in range(0, len(user_ids), REPORT_BATCH_SIZE)
+    ]
+    if batches:
+        group(task.s(batch, *args) for batch in batches).apply_async()
+    
+    logger.info(f"{task.name}: {len(user_ids)} users in {len(batches)} batches")
+    return {'users': len(user_ids), 'batches': len(batches)}
+
+
 @shared_task
 def send_daily_budget_summary():
     """
     Send daily budget summary to all users with email notifications enabled
     """
-    from users.models import User
-    from transactions.models import Transaction, Budget
+    from transactions.models import DailyTotal
     
     today = timezone.now().date()
-    users = User.objects.filter(email_notifications=True)
     
+    # Users without transactions today get no summary
+    user_ids = list(DailyTotal.objects.filter(
+        user__email_notifications=True,
+        date=today
+    ).values_list('user_id', flat=True).distinct())
+    
+    return _fan_out(send_daily_budget_summary_batch, user_ids, today.isoformat())
+
+
+@shared_task
+def send_daily_budget_summary_batch(user_ids, day):
+    """
+    Send the daily summary to one batch of users
+    
+    Args:
+        user_ids: User IDs
+        day: ISO date being summarized
+    """
+    from users.models import User
+    from transactions.models import DailyTotal, Budget, cents_to_decimal
+    
+    today = datetime.fromisoformat(day).date()
+    
+    # Today's per-type totals for the whole batch, read straight from the rollup
+    daily_totals = defaultdict(dict)
+    transaction_counts = defaultdict(int)
+    for user_id, transaction_type, total_cents, count in DailyTotal.objects.filter(
+        user_id__in=user_ids,
+        user__email_notifications=True,
+        date=today
+    ).values_list('user_id', 'type', 'total_cents', 'transaction_count'):
+        daily_totals[user_id][transaction_type] = cents_to_decimal(total_cents)
+        transaction_counts[user_id] += count
+    
+    if not transaction_counts:
+        return
+    
+    users = User.objects.filter(
+        id__in=list(transaction_counts)
+    ).only('id', 'email', 'first_name', 'username')
+    
+    # Budgets past their alert threshold, with spending annotated, grouped per user
+    budgets_by_user = defaultdict(list)
+    for budget in Budget.objects.filter(
+        user_id__in=list(transaction_counts)
+    ).select_related('category').at_alert_threshold():
+        budgets_by_user[budget.user_id].append(budget)
+    
+    # Rendered here, sent by drain_mail_outbox so SMTP never stalls this task
+    outbox = []
     for user in users:
         try:
-            # Get today's transactions
-            daily_transactions = Transaction.objects.filter(
-                user=user,
-                date=today
-            )
-            
-            if not daily_transactions.exists():
-                continue
-            
-            # Calculate daily spending
-            daily_spending = daily_transactions.filter(
-                type='expense'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            
-            daily_income = daily_transactions.filter(
-                type='income'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            daily_spending = daily_totals[user.id].get('expense') or Decimal('0.00')
+            daily_income = daily_totals[user.id].get('income') or Decimal('0.00')
+            transaction_count = transaction_counts[user.id]
             
             # Get budget status
-            budgets = Budget.objects.filter(user=user)
             budget_alerts = []
             
-            for budget in budgets:
+            for budget in budgets_by_user[user.id]:
                 percentage = budget.get_percentage_used()
                 if percentage >= budget.alert_threshold:
                     budget_alerts.append({
@@ -65,38 +125,21 @@ def send_daily_budget_summary():
                 'date': today,
                 'daily_spending': daily_spending,
                 'daily_income': daily_income,
-                'transaction_count': daily_transactions.count(),
+                'transaction_count': transaction_count,
                 'budget_alerts': budget_alerts,
             }
             
             subject = f'Daily Budget Summary - {today.strftime("%B %d, %Y")}'
-            message = f"""
-            Hi {user.first_name or user.username},
-            
-            Here's your daily financial summary for {today}:
-            
-            💸 Total Spending: ${daily_spending}
-            💰 Total Income: ${daily_income}
-            📊 Transactions: {daily_transactions.count()}
+            message = render_to_string('emails/daily_summary.txt', context)
             
-            {'⚠️ Budget Alerts:' if budget_alerts else ''}
-            {chr(10).join([f"  - {alert['category']}: {alert['percentage']:.1f}% (${alert['spent']} of ${alert['limit']})" for alert in budget_alerts])}
-            
-            Keep tracking your finances with FinanceFlow!
-            """
-            
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=False,
-            )
+            outbox.append((user.email, subject, message))
             
-            logger.info(f"Daily summary sent to {user.email}")
+            logger.info(f"Daily summary queued for {user.email}")
         
         except Exception as e:
-            logger.error(f"Error sending daily summary to {user.email}: {e}")
+            logger.error(f"Error preparing daily summary for {user.email}: {e}")
+    
+    queue_mail(outbox)
 
 
 @shared_task
@@ -104,13 +147,43 @@ def send_weekly_report():
     """
     Send weekly financial report every Monday
     """
-    from users.models import User
-    from transactions.models import Transaction
+    from transactions.models import DailyTotal
     
     today = timezone.now().date()
     week_start = today - timedelta(days=7)
-    users = User.objects.filter(email_notifications=True)
     
+    # Users without transactions this week get no report
+    user_ids = list(DailyTotal.objects.filter(
+        user__email_notifications=True,
+        date__gte=week_start,
+        date__lte=today
+    ).values_list('user_id', flat=True).distinct())
+    
+    return _fan_out(send_weekly_report_batch, user_ids, week_start.isoformat(), today.isoformat())
+
+
+@shared_task
+def send_weekly_report_batch(user_ids, start, end):
+    """
+    Send the weekly report to one batch of users
+    
+    Args:
+        user_ids: User IDs
+        start: ISO date the week starts on
+        end: ISO date the week ends on (inclusive)
+    """
+    from users.models import User
+    from transactions.models import Transaction, DailyTotal, cents_to_decimal
+    
+    week_start = datetime.fromisoformat(start).date()
+    today = datetime.fromisoformat(end).date()
+    users = User.objects.filter(
+        id__in=user_ids,
+        email_notifications=True
+    ).only('id', 'email', 'first_name', 'username')
+    
+    # Rendered here, sent by drain_mail_outbox so SMTP never stalls this task
+    outbox = []
     for user in users:
         try:
             # Get week's transactions
@@ -120,56 +193,54 @@ def send_weekly_report():
                 date__lte=today
             )
             
-            if not weekly_transactions.exists():
-                continue
+            # Calculate weekly totals from the daily rollup in one query
+            totals = DailyTotal.objects.filter(
+                user=user,
+                date__gte=week_start,
+                date__lte=today
+            ).aggregate(
+                spending=Sum('total_cents', filter=Q(type='expense')),
+                income=Sum('total_cents', filter=Q(type='income')),
+                count=Sum('transaction_count')
+            )
             
-            # Calculate weekly totals
-            weekly_spending = weekly_transactions.filter(
-                type='expense'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            if not totals['count']:
+                continue
             
-            weekly_income = weekly_transactions.filter(
-                type='income'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            weekly_spending = cents_to_decimal(totals['spending'])
+            weekly_income = cents_to_decimal(totals['income'])
             
             # Category breakdown
+            # (name, total) rows; the template unpacks the tuples directly
             category_breakdown = weekly_transactions.filter(
                 type='expense'
             ).values('category__name').annotate(
-                total=Sum('amount'),
-                count=Count('id')
-            ).order_by('-total')[:5]
+                total=Sum('amount')
+            ).order_by('-total').values_list('category__name', 'total')[:5]
             
             # Send email
-            subject = f'Weekly Financial Report - Week of {week_start.strftime("%b %d")}'
-            message = f"""
-            Hi {user.first_name or user.username},
-            
-            Here's your weekly financial report ({week_start} to {today}):
-            
-            💸 Total Spending: ${weekly_spending}
-            💰 Total Income: ${weekly_income}
-            💵 Net: ${weekly_income - weekly_spending}
-            📊 Transactions: {weekly_transactions.count()}
-            
-            Top Spending Categories:
-            {chr(10).join([f"  {i+1}. {cat['category__name'] or 'Uncategorized'}: ${cat['total']}" for i, cat in enumerate(category_breakdown)])}
+            context = {
+                'user': user,
+                'week_start': week_start,
+                'week_end': today,
+                'weekly_spending': weekly_spending,
+                'weekly_income': weekly_income,
+                'net': weekly_income - weekly_spending,
+                'transaction_count': totals['count'],
+                'category_breakdown': category_breakdown,
+            }
             
-            Keep up the great work tracking your finances!
-            """
+            subject = f'Weekly Financial Report - Week of {week_start.strftime("%b %d")}'
+            message = render_to_string('emails/weekly_report.txt', context)
             
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=False,
-            )
+            outbox.append((user.email, subject, message))
             
-            logger.info(f"Weekly report sent to {user.email}")
+            logger.info(f"Weekly report queued for {user.email}")
         
         except Exception as e:
-            logger.error(f"Error sending weekly report to {user.email}: {e}")
+            logger.error(f"Error preparing weekly report for {user.email}: {e}")
+    
+    queue_mail(outbox)
 
 
 @shared_task
@@ -177,16 +248,45 @@ def send_monthly_report():
     """
     Send monthly financial report on the first day of each month
     """
-    from users.models import User
-    from transactions.models import Transaction
+    from transactions.models import DailyTotal
     
     today = timezone.now().date()
     last_month = today.replace(day=1) - timedelta(days=1)
     month_start = last_month.replace(day=1)
-    month_end = last_month
     
-    users = User.objects.filter(email_notifications=True)
+    # Users without transactions last month get no report
+    user_ids = list(DailyTotal.objects.filter(
+        user__email_notifications=True,
+        date__gte=month_start,
+        date__lte=last_month
+    ).values_list('user_id', flat=True).distinct())
     
+    return _fan_out(send_monthly_report_batch, user_ids, month_start.isoformat(), last_month.isoformat())
+
+
+@shared_task
+def send_monthly_report_batch(user_ids, start, end):
+    """
+    Send the monthly report to one batch of users
+    
+    Args:
+        user_ids: User IDs
+        start: ISO date of the first day of the month
+        end: ISO date of the last day of the month
+    """
+    from users.models import User
+    from transactions.models import Transaction, DailyTotal, cents_to_decimal
+    
+    month_start = datetime.fromisoformat(start).date()
+    month_end = datetime.fromisoformat(end).date()
+    last_month = month_end
+    users = User.objects.filter(
+        id__in=user_ids,
+        email_notifications=True
+    ).only('id', 'email', 'first_name', 'username')
+    
+    # Rendered here, sent by drain_mail_outbox so SMTP never stalls this task
+    outbox = []
     for user in users:
         try:
             # Get month's transactions
@@ -196,66 +296,62 @@ def send_monthly_report():
                 date__lte=month_end
             )
             
-            if not monthly_transactions.exists():
-                continue
-            
-            # Calculate monthly totals
-            monthly_spending = monthly_transactions.filter(
-                type='expense'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            # Calculate monthly totals from the daily rollup in one query
+            totals = DailyTotal.objects.filter(
+                user=user,
+                date__gte=month_start,
+                date__lte=month_end
+            ).aggregate(
+                spending=Sum('total_cents', filter=Q(type='expense')),
+                income=Sum('total_cents', filter=Q(type='income')),
+                investment=Sum('total_cents', filter=Q(type='investment')),
+                count=Sum('transaction_count')
+            )
             
-            monthly_income = monthly_transactions.filter(
-                type='income'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            if not totals['count']:
+                continue
             
-            monthly_investment = monthly_transactions.filter(
-                type='investment'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            monthly_spending = cents_to_decimal(totals['spending'])
+            monthly_income = cents_to_decimal(totals['income'])
+            monthly_investment = cents_to_decimal(totals['investment'])
             
             # Category breakdown
+            # (name, total, count) rows; the template unpacks the tuples directly
             category_breakdown = monthly_transactions.filter(
                 type='expense'
             ).values('category__name').annotate(
                 total=Sum('amount'),
                 count=Count('id')
-            ).order_by('-total')[:10]
+            ).order_by('-total').values_list('category__name', 'total', 'count')[:10]
             
             # Savings rate
             savings = monthly_income - monthly_spending - monthly_investment
             savings_rate = (savings / monthly_income * 100) if monthly_income > 0 else 0
             
             # Send email
-            subject = f'Monthly Financial Report - {last_month.strftime("%B %Y")}'
-            message = f"""
-            Hi {user.first_name or user.username},
-            
-            Here's your monthly financial report for {last_month.strftime("%B %Y")}:
-            
-            💰 Total Income: ${monthly_income}
-            💸 Total Spending: ${monthly_spending}
-            📈 Investments: ${monthly_investment}
-            💵 Net Savings: ${savings}
-            📊 Savings Rate: {savings_rate:.1f}%
-            🔢 Total Transactions: {monthly_transactions.count()}
-            
-            Top Spending Categories:
-            {chr(10).join([f"  {i+1}. {cat['category__name'] or 'Uncategorized'}: ${cat['total']} ({cat['count']} transactions)" for i, cat in enumerate(category_breakdown)])}
+            context = {
+                'user': user,
+                'month': last_month,
+                'monthly_income': monthly_income,
+                'monthly_spending': monthly_spending,
+                'monthly_investment': monthly_investment,
+                'savings': savings,
+                'savings_rate': savings_rate,
+                'transaction_count': totals['count'],
+                'category_breakdown': category_breakdown,
+            }
             
-            {'🎉 Great job! You maintained a positive savings rate!' if savings > 0 else '⚠️ Consider reviewing your budget to improve your savings rate.'}
-            """
+            subject = f'Monthly Financial Report - {last_month.strftime("%B %Y")}'
+            message = render_to_string('emails/monthly_report.txt', context)
             
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=False,
-            )
+            outbox.append((user.email, subject, message))
             
-            logger.info(f"Monthly report sent to {user.email}")
+            logger.info(f"Monthly report queued for {user.email}")
         
         except Exception as e:
-            logger.error(f"Error sending monthly report to {user.email}: {e}")
+            logger.error(f"Error preparing monthly report for {user.email}: {e}")
+    
+    queue_mail(outbox)
 
 
 @shared_task
@@ -265,48 +361,138 @@ def check_budget_alerts():
     Runs every 30 minutes
     """
     from transactions.models import Budget
-    from users.models import User
     
-    budgets = Budget.objects.filter(alert_enabled=True)
+    # Budgets of users who opted out of emails are skipped up front
+    user_ids = list(Budget.objects.filter(
+        alert_enabled=True,
+        user__email_notifications=True
+    ).order_by().values_list('user_id', flat=True).distinct())
     
+    return _fan_out(check_budget_alerts_batch, user_ids)
+
+
+@shared_task
+def check_budget_alerts_batch(user_ids):
+    """
+    Check the alert-enabled budgets of one batch of users
+    
+    Args:
+        user_ids: User IDs
+    """
+    from transactions.models import Budget
+    
+    # Only budgets past their threshold come back, with spending annotated
+    budgets = Budget.objects.filter(
+        user_id__in=user_ids,
+        alert_enabled=True,
+        user__email_notifications=True
+    ).select_related('category', 'user').at_alert_threshold()
+    
+    # Rendered here, sent by drain_mail_outbox so SMTP never stalls this task
+    outbox = []
     for budget in budgets:
         try:
             if budget.should_alert():
                 user = budget.user
                 
-                if not user.email_notifications:
-                    continue
-                
-                percentage = budget.get_percentage_used()
-                spent = budget.get_spending()
+                context = {
+                    'user': user,
+                    'budget': budget,
+                    'percentage': budget.get_percentage_used(),
+                    'spent': budget.get_spending(),
+                    'over_budget': budget.is_over_budget(),
+                }
                 
                 subject = f'⚠️ Budget Alert: {budget.category.name}'
-                message = f"""
-                Hi {user.first_name or user.username},
-                
-                You've reached {percentage:.1f}% of your {budget.category.name} budget!
+                message = render_to_string('emails/budget_alert.txt', context)
                 
-                💸 Spent: ${spent}
-                💰 Budget: ${budget.amount}
-                🕐 Period: {budget.period}
+                outbox.append((user.email, subject, message))
                 
-                {'🚨 You are over budget!' if budget.is_over_budget() else '⚠️ Approaching budget limit!'}
-                
-                Review your spending in the FinanceFlow dashboard.
-                """
-                
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [user.email],
-                    fail_silently=False,
-                )
-                
-                logger.info(f"Budget alert sent to {user.email} for {budget.category.name}")
+                logger.info(f"Budget alert queued for {user.email} for {budget.category.name}")
         
         except Exception as e:
             logger.error(f"Error checking budget alert for budget {budget.id}: {e}")
+    
+    queue_mail(outbox)
+
+
+def _investment_window(today, time_interval):
+    """Start date of the investment return window ending today"""
+    if time_interval == 'daily':
+        return today - timedelta(days=1)
+    elif time_interval == 'weekly':
+        return today - timedelta(days=7)
+    # Calendar months and years rather than 30/365 days, matching the reports
+    elif time_interval == 'monthly':
+        return today - relativedelta(months=1)
+    elif time_interval == 'yearly':
+        return today - relativedelta(years=1)
+    return today - relativedelta(months=1)
+
+
+def _estimated_return(total_invested, days):
+    """Estimated return on total_invested over days"""
+    # Placeholder - would integrate with real investment API
+    # For demo purposes, assume 7% annual return
+    annual_return = 0.07
+    return total_invested * Decimal(str(annual_return * days / 365))
+
+
+@shared_task
+def drain_mail_outbox(batch_size=200):
+    """
+    Send queued report emails over one SMTP connection, batch_size at a time
+    Runs every minute
+    """
+    client = outbox_client()
+    if client is None:
+        return {'sent': 0}
+    
+    # Pop before connecting so an idle outbox never opens an SMTP session
+    items = client.lpop(OUTBOX_KEY, batch_size)
+    if not items:
+        return {'sent': 0}
+    
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        client.lpush(OUTBOX_KEY, *reversed(items))
+        logger.error(f"Mail outbox: can't reach the mail server: {e}")
+        return {'sent': 0}
+    
+    sent = 0
+    with connection:
+        while items:
+            for index, item in enumerate(items):
+                try:
+                    message = decode_mail(item)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Dropping unreadable mail outbox entry: {e}")
+                    continue
+                
+                try:
+                    connection.send_messages([message])
+                    sent += 1
+                except SMTPRecipientsRefused as e:
+                    # Retrying won't help a rejected address
+                    logger.error(f"Dropping email to {message.to}: {e}")
+                except Exception as e:
+                    # SMTP trouble: the untried rest goes back at the head, this
+                    # one to the back so it can't hold up the queue on every run
+                    rest = items[index + 1:]
+                    if rest:
+                        client.lpush(OUTBOX_KEY, *reversed(rest))
+                    if not requeue_failed_mail(client, item):
+                        logger.error(f"Moved email to {message.to} to the dead-letter list")
+                    logger.error(f"Mail outbox paused after {sent} emails: {e}")
+                    return {'sent': sent}
+            
+            items = client.lpop(OUTBOX_KEY, batch_size)
+    
+    if sent:
+        logger.info(f"Mail outbox: sent {sent} emails")
+    return {'sent': sent}
 
 
 @shared_task
@@ -319,41 +505,28 @@ def calculate_investment_returns(user_id, time_interval='monthly'):
         time_interval: 'daily', 'weekly', 'monthly', 'yearly'
     """
     from users.models import User
-    from transactions.models import Transaction
+    from transactions.models import DailyTotal, cents_to_decimal
     
     try:
         user = User.objects.get(id=user_id)
         today = timezone.now().date()
         
         # Determine date range
-        if time_interval == 'daily':
-            start_date = today - timedelta(days=1)
-        elif time_interval == 'weekly':
-            start_date = today - timedelta(days=7)
-        elif time_interval == 'monthly':
-            start_date = today - timedelta(days=30)
-        elif time_interval == 'yearly':
-            start_date = today - timedelta(days=365)
-        else:
-            start_date = today - timedelta(days=30)
+        start_date = _investment_window(today, time_interval)
         
-        # Get investment transactions
-        investments = Transaction.objects.filter(
+        # Sum the daily investment rollup rather than individual transactions
+        investments = DailyTotal.objects.filter(
             user=user,
             type='investment',
             date__gte=start_date,
             date__lte=today
         )
         
-        total_invested = investments.aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
+        total_invested = cents_to_decimal(investments.aggregate(
+            invested_cents=Sum('total_cents')
+        )['invested_cents'])
         
-        # Calculate returns (placeholder - would integrate with real investment API)
-        # For demo purposes, assume 7% annual return
-        days = (today - start_date).days
-        annual_return = 0.07
-        estimated_return = total_invested * Decimal(str(annual_return * days / 365))
+        estimated_return = _estimated_return(total_invested, (today - start_date).days)
         
         logger.info(
             f"Investment calculation for {user.email}: "
@@ -373,47 +546,328 @@ def calculate_investment_returns(user_id, time_interval='monthly'):
 
 
 @shared_task
-def bulk_categorize_transactions(user_id):
+def calculate_investment_returns_batch(user_ids, time_interval='monthly'):
+    """
+    calculate_investment_returns for many users with one grouped query
+    
+    Args:
+        user_ids: User IDs
+        time_interval: 'daily', 'weekly', 'monthly', 'yearly'
+    """
+    from transactions.models import DailyTotal, cents_to_decimal
+    
+    today = timezone.now().date()
+    start_date = _investment_window(today, time_interval)
+    days = (today - start_date).days
+    
+    totals = dict(DailyTotal.objects.filter(
+        user_id__in=user_ids,
+        type='investment',
+        date__gte=start_date,
+        date__lte=today
+    ).values('user_id').annotate(invested_cents=Sum('total_cents')).values_list('user_id', 'invested_cents'))
+    
+    results = []
+    for user_id in user_ids:
+        total_invested = cents_to_decimal(totals.get(user_id))
+        results.append({
+            'user_id': user_id,
+            'interval': time_interval,
+            'total_invested': float(total_invested),
+            'estimated_return': float(_estimated_return(total_invested, days)),
+        })
+    
+    logger.info(f"Investment calculation for {len(user_ids)} users ({time_interval})")
+    return results
+
+
+@shared_task
+def bulk_categorize_transactions(user_id, transaction_ids=None):
     """
     Bulk categorize uncategorized transactions for a user
+    
+    Args:
+        user_id: User ID
+        transaction_ids: Optional list of transaction IDs to limit the run to
     """
     from transactions.models import Transaction
-    from categorization.ml_categorizer import TransactionCategorizer
-    from users.models import User
     
     try:
-        user = User.objects.get(id=user_id)
-        categorizer = TransactionCategorizer()
-        
         # Get uncategorized transactions
         uncategorized = Transaction.objects.filter(
-            user=user,
+            user_id=user_id,
             category__isnull=True
         )
+        if transaction_ids is not None:
+            uncategorized = uncategorized.filter(id__in=transaction_ids)
         
-        categorized_count = 0
-        
-        for transaction in uncategorized:
-            category, confidence = categorizer.predict(transaction.description, user)
-            
-            if category and confidence > 0.5:
-                transaction.category = category
-                transaction.auto_categorized = True
-                transaction.confidence_score = confidence
-                transaction.save()
-                categorized_count += 1
+        # One vectorized prediction and a batched UPDATE instead of predict() + save() per row
+        result = categorize_transactions(list(uncategorized.values_list('id', flat=True)))
         
         logger.info(
-            f"Bulk categorization completed for {user.email}: "
-            f"{categorized_count} of {uncategorized.count()} transactions"
+            f"Bulk categorization completed for user {user_id}: "
+            f"{result['categorized']} of {result['total']} transactions"
         )
         
         return {
             'user_id': user_id,
-            'total': uncategorized.count(),
-            'categorized': categorized_count
+            'total': result['total'],
+            'categorized': result['categorized']
         }
     
     except Exception as e:
         logger.error(f"Error in bulk categorization for user {user_id}: {e}")
         return None
+
+
+@shared_task
+def categorize_transactions(transaction_ids):
+    """
+    Categorize transactions in the background, one predict_batch call per user
+    Rows that already have a category by the time this runs are left alone
+    
+    Args:
+        transaction_ids: List of transaction IDs
+    """
+    from transactions.models import Transaction
+    from categorization.ml_categorizer import get_categorizer
+    from users.models import User
+    from api.cache import invalidate_analytics_cache
+    
+    pending = Transaction.objects.filter(
+        id__in=transaction_ids,
+        category__isnull=True
+    ).only('id', 'description', 'user')
+    
+    by_user = defaultdict(list)
+    for transaction in pending:
+        by_user[transaction.user_id].append(transaction)
+    
+    if not by_user:
+        return {'total': 0, 'categorized': 0}
+    
+    users = User.objects.in_bulk(list(by_user))
+    categorizer = get_categorizer()
+    now = timezone.now()
+    categorized = []
+    
+    for user_id, transactions in by_user.items():
+        predictions = categorizer.predict_batch(
+            [transaction.description for transaction in transactions],
+            users.get(user_id)
+        )
+        for transaction, (category, confidence) in zip(transactions, predictions):
+            if category and confidence > 0.5:
+                transaction.category = category
+                transaction.auto_categorized = True
+                transaction.confidence_score = confidence
+                transaction.updated_at = now
+                categorized.append(transaction)
+    
+    # Rows sharing an outcome (keyword rule hits, remembered corrections) get
+    # one plain UPDATE per group; unique ML scores are written with CASE WHEN in
+    # chunks. Both skip rows the user categorized after they were read above
+    outcomes = defaultdict(list)
+    for transaction in categorized:
+        outcomes[(transaction.category_id, transaction.confidence_score)].append(transaction)
+    
+    updated = 0
+    singles = []
+    for (category_id, confidence), transactions in outcomes.items():
+        if len(transactions) == 1:
+            singles.extend(transactions)
+            continue
+        updated += Transaction.objects.filter(
+            id__in=[transaction.id for transaction in transactions],
+            category__isnull=True
+        ).update(
+            category_id=category_id,
+            auto_categorized=True,
+            confidence_score=confidence,
+            updated_at=now
+        )
+    
+    for start in range(0, len(singles), 500):
+        chunk = singles[start:start + 500]
+        updated += Transaction.objects.filter(
+            id__in=[transaction.id for transaction in chunk],
+            category__isnull=True
+        ).update(
+            category_id=Case(*[
+                When(id=transaction.id, then=Value(transaction.category_id))
+                for transaction in chunk
+            ]),
+            confidence_score=Case(*[
+                When(id=transaction.id, then=Value(transaction.confidence_score))
+                for transaction in chunk
+            ]),
+            auto_categorized=True,
+            updated_at=now
+        )
+    
+    # update() doesn't send post_save
+    for user_id in {transaction.user_id for transaction in categorized}:
+        invalidate_analytics_cache(user_id)
+    
+    total = sum(len(transactions) for transactions in by_user.values())
+    logger.info(f"Background categorization: {updated} of {total} transactions")
+    
+    return {
+        'total': total,
+        'categorized': updated
+    }
+
+
+@shared_task
+def reconcile_uncategorized_transactions():
+    """
+    Safety net for categorize_transactions: pick up recently created rows that
+    are still uncategorized, e.g. because their task was lost
+    """
+    from transactions.models import Transaction
+    
+    since = timezone.now() - timedelta(minutes=30)
+    transaction_ids = list(Transaction.objects.filter(
+        category__isnull=True,
+        created_at__gte=since
+    ).values_list('id', flat=True))
+    
+    if not transaction_ids:
+        return {'total': 0, 'categorized': 0}
+    return categorize_transactions(transaction_ids)
+
+
+@shared_task
+def prune_description_category_cache(max_age_days=180):
+    """Drop remembered description corrections that haven't matched anything in a while"""
+    from categorization.models import DescriptionCategoryCache
+    
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    deleted, _ = DescriptionCategoryCache.objects.filter(last_used_at__lt=cutoff).delete()
+    logger.info(f"Pruned {deleted} unused description category cache entries")
+    return {'deleted': deleted}
+
+
+@shared_task(bind=True)
+def process_csv_upload(self, user_id, storage_path):
+    """
+    Import transactions from an uploaded CSV file
+    Expected format: date,amount,type,description,category(optional)
+    
+    Args:
+        user_id: User ID
+        storage_path: Path of the uploaded file in default_storage
+    """
+    from django.core.files.storage import default_storage
+    from django.db import transaction as db_transaction
+    from transactions.models import Transaction, Category
+    from api.cache import invalidate_analytics_cache
+    
+    transactions = []
+    errors = []
+    
+    try:
+        # Resolve category names against one preloaded lookup, not a query per row
+        category_ids = {
+            name.lower(): category_id
+            for category_id, name in Category.objects.filter(
+                Q(user_id=user_id) | Q(is_system=True)
+            ).order_by('-is_system').values_list('id', 'name')
+        }
+        valid_types = {choice for choice, _ in Transaction.TRANSACTION_TYPES}
+        
+        with default_storage.open(storage_path, 'rb') as csv_file:
+            # Decode lazily instead of reading the whole file into memory
+            reader = csv.reader(io.TextIOWrapper(csv_file, encoding='utf-8', newline=''))
+            
+            header = [column.strip().lower() for column in next(reader, [])]
+            columns = {name: index for index, name in enumerate(header)}
+            
+            def get_column(row, name, default=''):
+                index = columns.get(name)
+                if index is None or index >= len(row):
+                    return default
+                return row[index].strip()
+            
+            for row_num, row in enumerate(reader, start=2):
+                if row_num % 1000 == 0:
+                    self.update_state(state='PROGRESS', meta={'processed': row_num - 1})
+                
+                try:
+                    row_errors = {}
+                    
+                    try:
+                        date = datetime.strptime(get_column(row, 'date'), '%Y-%m-%d').date()
+                    except ValueError:
+                        row_errors['date'] = ['Date has wrong format. Use YYYY-MM-DD.']
+                    
+                    try:
+                        amount = Decimal(get_column(row, 'amount'))
+                    except InvalidOperation:
+                        amount = None
+                    if amount is None or not amount.is_finite() or amount >= Decimal('1e10'):
+                        row_errors['amount'] = ['A valid number is required.']
+                    elif amount < Decimal('0.01'):
+                        row_errors['amount'] = ['Ensure this value is greater than or equal to 0.01.']
+                    else:
+                        amount = amount.quantize(Decimal('0.01'))
+                    
+                    transaction_type = get_column(row, 'type') or 'expense'
+                    if transaction_type not in valid_types:
+                        row_errors['type'] = [f'"{transaction_type}" is not a valid choice.']
+                    
+                    description = get_column(row, 'description')
+                    if not description:
+                        row_errors['description'] = ['This field may not be blank.']
+                    elif len(description) > 500:
+                        row_errors['description'] = ['Ensure this field has no more than 500 characters.']
+                    
+                    if row_errors:
+                        errors.append({
+                            'row': row_num,
+                            'errors': row_errors
+                        })
+                        continue
+                    
+                    # Optional category (user categories win over system ones)
+                    category_name = get_column(row, 'category')
+                    category_id = category_ids.get(category_name.lower()) if category_name else None
+                    
+                    transactions.append(Transaction(
+                        user_id=user_id,
+                        date=date,
+                        amount=amount,
+                        type=transaction_type,
+                        description=description,
+                        category_id=category_id,
+                    ))
+                
+                except Exception as e:
+                    errors.append({
+                        'row': row_num,
+                        'error': str(e)
+                    })
+        
+        # All-or-nothing insert
+        with db_transaction.atomic():
+            Transaction.objects.bulk_create(transactions, batch_size=1000)
+    
+    finally:
+        default_storage.delete(storage_path)
+    
+    # bulk_create doesn't send post_save
+    if transactions:
+        invalidate_analytics_cache(user_id)
+    
+    # bulk_create skips Transaction.save(), so categorize the new rows in one background batch
+    uncategorized_ids = [t.pk for t in transactions if t.category_id is None and t.pk]
+    if uncategorized_ids:
+        categorize_transactions.delay(uncategorized_ids)
+    
+    logger.info(f"CSV import for user {user_id}: {len(transactions)} created, {len(errors)} errors")
+    
+    return {
+        'user_id': user_id,
+        'created': len(transactions),
+        'errors': errors
+    }
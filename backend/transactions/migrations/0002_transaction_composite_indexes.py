@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-15 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="transaction_user_id_059bf9_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="transaction_user_id_7b4347_idx",
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "-date"], name="transaction_user_id_dff1f0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "type", "date"], name="transaction_user_id_3860f0_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-15 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0002_transaction_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="transaction_user_id_dff1f0_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="transaction_user_id_3860f0_idx",
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "-date"],
+                include=("type", "amount"),
+                name="transaction_user_date_cov_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "type", "date"],
+                include=("amount",),
+                name="transaction_user_type_cov_idx",
+            ),
+        ),
+    ]
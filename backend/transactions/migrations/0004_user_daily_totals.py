@@ -0,0 +1,191 @@
+# Generated by Django 4.2.30 on 2026-10-15 21:33
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Keep user_daily_totals in step with transactions. Updates only matter when
+# a column the rollup is keyed or summed on changes, so categorization and
+# note edits don't touch it.
+POSTGRESQL_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION user_daily_totals_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE user_daily_totals
+            SET total = total - OLD.amount,
+                transaction_count = transaction_count - 1
+            WHERE user_id = OLD.user_id AND date = OLD.date AND type = OLD.type;
+            DELETE FROM user_daily_totals
+            WHERE user_id = OLD.user_id AND date = OLD.date AND type = OLD.type
+                AND transaction_count <= 0;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO user_daily_totals (user_id, date, type, total, transaction_count)
+            VALUES (NEW.user_id, NEW.date, NEW.type, NEW.amount, 1)
+            ON CONFLICT (user_id, date, type) DO UPDATE
+            SET total = user_daily_totals.total + EXCLUDED.total,
+                transaction_count = user_daily_totals.transaction_count + 1;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER transactions_daily_totals_insert_delete
+    AFTER INSERT OR DELETE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION user_daily_totals_apply();
+    """,
+    """
+    CREATE TRIGGER transactions_daily_totals_update
+    AFTER UPDATE OF user_id, date, type, amount ON transactions
+    FOR EACH ROW
+    WHEN (
+        OLD.user_id IS DISTINCT FROM NEW.user_id OR OLD.date IS DISTINCT FROM NEW.date
+        OR OLD.type IS DISTINCT FROM NEW.type OR OLD.amount IS DISTINCT FROM NEW.amount
+    )
+    EXECUTE FUNCTION user_daily_totals_apply();
+    """,
+]
+
+SQLITE_ADD = """
+    INSERT INTO user_daily_totals (user_id, date, type, total, transaction_count)
+    VALUES (NEW.user_id, NEW.date, NEW.type, NEW.amount, 1)
+    ON CONFLICT (user_id, date, type) DO UPDATE
+    SET total = total + excluded.total,
+        transaction_count = transaction_count + 1;
+"""
+
+SQLITE_REMOVE = """
+    UPDATE user_daily_totals
+    SET total = total - OLD.amount,
+        transaction_count = transaction_count - 1
+    WHERE user_id = OLD.user_id AND date = OLD.date AND type = OLD.type;
+    DELETE FROM user_daily_totals
+    WHERE user_id = OLD.user_id AND date = OLD.date AND type = OLD.type
+        AND transaction_count <= 0;
+"""
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER transactions_daily_totals_insert
+    AFTER INSERT ON transactions
+    BEGIN {SQLITE_ADD} END;
+    """,
+    f"""
+    CREATE TRIGGER transactions_daily_totals_delete
+    AFTER DELETE ON transactions
+    BEGIN {SQLITE_REMOVE} END;
+    """,
+    f"""
+    CREATE TRIGGER transactions_daily_totals_update
+    AFTER UPDATE OF user_id, date, type, amount ON transactions
+    WHEN OLD.user_id IS NOT NEW.user_id OR OLD.date IS NOT NEW.date
+        OR OLD.type IS NOT NEW.type OR OLD.amount IS NOT NEW.amount
+    BEGIN {SQLITE_REMOVE} {SQLITE_ADD} END;
+    """,
+]
+
+DROP_TRIGGERS = {
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS transactions_daily_totals_insert_delete ON transactions;",
+        "DROP TRIGGER IF EXISTS transactions_daily_totals_update ON transactions;",
+        "DROP FUNCTION IF EXISTS user_daily_totals_apply();",
+    ],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS transactions_daily_totals_insert;",
+        "DROP TRIGGER IF EXISTS transactions_daily_totals_delete;",
+        "DROP TRIGGER IF EXISTS transactions_daily_totals_update;",
+    ],
+}
+
+BACKFILL = """
+    INSERT INTO user_daily_totals (user_id, date, type, total, transaction_count)
+    SELECT user_id, date, type, SUM(amount), COUNT(*)
+    FROM transactions
+    GROUP BY user_id, date, type;
+"""
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        statements = POSTGRESQL_TRIGGERS
+    elif vendor == "sqlite":
+        statements = SQLITE_TRIGGERS
+    else:
+        raise NotImplementedError(
+            f"user_daily_totals triggers are not defined for {vendor}"
+        )
+
+    for statement in statements:
+        schema_editor.execute(statement)
+    schema_editor.execute(BACKFILL)
+
+
+def drop_triggers(apps, schema_editor):
+    for statement in DROP_TRIGGERS.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("transactions", "0003_transaction_covering_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyTotal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("income", "Income"),
+                            ("expense", "Expense"),
+                            ("investment", "Investment"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "total",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                ("transaction_count", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "user_daily_totals",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailytotal",
+            constraint=models.UniqueConstraint(
+                fields=("user", "date", "type"), name="user_daily_totals_user_date_type"
+            ),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,123 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+# Trigger SQL and teardown from the migration that created the rollup
+initial = import_module("transactions.migrations.0004_user_daily_totals")
+
+CENTS = "CAST(ROUND({}.amount * 100) AS BIGINT)"
+
+POSTGRESQL_TRIGGERS = [
+    f"""
+    CREATE OR REPLACE FUNCTION user_daily_totals_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE user_daily_totals
+            SET total_cents = total_cents - {CENTS.format("OLD")},
+                transaction_count = transaction_count - 1
+            WHERE user_id = OLD.user_id AND date = OLD.date AND type = OLD.type;
+            DELETE FROM user_daily_totals
+            WHERE user_id = OLD.user_id AND date = OLD.date AND type = OLD.type
+                AND transaction_count <= 0;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO user_daily_totals (user_id, date, type, total_cents, transaction_count)
+            VALUES (NEW.user_id, NEW.date, NEW.type, {CENTS.format("NEW")}, 1)
+            ON CONFLICT (user_id, date, type) DO UPDATE
+            SET total_cents = user_daily_totals.total_cents + EXCLUDED.total_cents,
+                transaction_count = user_daily_totals.transaction_count + 1;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    *initial.POSTGRESQL_TRIGGERS[1:],
+]
+
+SQLITE_ADD = f"""
+    INSERT INTO user_daily_totals (user_id, date, type, total_cents, transaction_count)
+    VALUES (NEW.user_id, NEW.date, NEW.type, {CENTS.format("NEW")}, 1)
+    ON CONFLICT (user_id, date, type) DO UPDATE
+    SET total_cents = total_cents + excluded.total_cents,
+        transaction_count = transaction_count + 1;
+"""
+
+SQLITE_REMOVE = f"""
+    UPDATE user_daily_totals
+    SET total_cents = total_cents - {CENTS.format("OLD")},
+        transaction_count = transaction_count - 1
+    WHERE user_id = OLD.user_id AND date = OLD.date AND type = OLD.type;
+    DELETE FROM user_daily_totals
+    WHERE user_id = OLD.user_id AND date = OLD.date AND type = OLD.type
+        AND transaction_count <= 0;
+"""
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER transactions_daily_totals_insert
+    AFTER INSERT ON transactions
+    BEGIN {SQLITE_ADD} END;
+    """,
+    f"""
+    CREATE TRIGGER transactions_daily_totals_delete
+    AFTER DELETE ON transactions
+    BEGIN {SQLITE_REMOVE} END;
+    """,
+    f"""
+    CREATE TRIGGER transactions_daily_totals_update
+    AFTER UPDATE OF user_id, date, type, amount ON transactions
+    WHEN OLD.user_id IS NOT NEW.user_id OR OLD.date IS NOT NEW.date
+        OR OLD.type IS NOT NEW.type OR OLD.amount IS NOT NEW.amount
+    BEGIN {SQLITE_REMOVE} {SQLITE_ADD} END;
+    """,
+]
+
+BACKFILL = f"""
+    INSERT INTO user_daily_totals (user_id, date, type, total_cents, transaction_count)
+    SELECT user_id, date, type, SUM({CENTS.format("transactions")}), COUNT(*)
+    FROM transactions
+    GROUP BY user_id, date, type;
+"""
+
+
+def clear_rollup(apps, schema_editor):
+    initial.drop_triggers(apps, schema_editor)
+    schema_editor.execute("DELETE FROM user_daily_totals;")
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        statements = POSTGRESQL_TRIGGERS
+    elif vendor == "sqlite":
+        statements = SQLITE_TRIGGERS
+    else:
+        raise NotImplementedError(
+            f"user_daily_totals triggers are not defined for {vendor}"
+        )
+
+    for statement in statements:
+        schema_editor.execute(statement)
+    schema_editor.execute(BACKFILL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0004_user_daily_totals"),
+    ]
+
+    operations = [
+        # Rebuilt from scratch in cents; the reverse restores the numeric rollup
+        migrations.RunPython(clear_rollup, initial.create_triggers),
+        migrations.RemoveField(
+            model_name="dailytotal",
+            name="total",
+        ),
+        migrations.AddField(
+            model_name="dailytotal",
+            name="total_cents",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(create_triggers, clear_rollup),
+    ]
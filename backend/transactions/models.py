@@ -2,10 +2,15 @@
 Transaction and Category models with Row-Level Security support
 """
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.core.validators import MinValueValidator
+import datetime
+import logging
 from decimal import Decimal
 
+logger = logging.getLogger(__name__)
+
 class Category(models.Model):
     """
     Transaction categories (both system-defined and user-defined)
@@ -98,9 +103,20 @@ class Transaction(models.Model):
         db_table = 'transactions'
         ordering = ['-date', '-created_at']
         indexes = [
-            models.Index(fields=['user', 'date']),
+            # List view and date-ranged analytics (newest first); type and amount
+            # ride along so per-type totals over a date range are index-only scans
+            models.Index(
+                fields=['user', '-date'],
+                include=['type', 'amount'],
+                name='transaction_user_date_cov_idx'
+            ),
             models.Index(fields=['user', 'category']),
-            models.Index(fields=['user', 'type']),
+            # Sums for one type over a date range; also covers plain (user, type) lookups
+            models.Index(
+                fields=['user', 'type', 'date'],
+                include=['amount'],
+                name='transaction_user_type_cov_idx'
+            ),
             models.Index(fields=['date']),
         ]
         # PostgreSQL RLS will be enabled through migrations
@@ -109,17 +125,123 @@ class Transaction(models.Model):
         return f"{self.date} - {self.description} (${self.amount})"
     
     def save(self, *args, **kwargs):
-        # Auto-categorize if category not set
-        if not self.category and not self.pk:
-            from categorization.ml_categorizer import TransactionCategorizer
-            categorizer = TransactionCategorizer()
-            predicted_category, confidence = categorizer.predict(self.description, self.user)
-            if predicted_category and confidence > 0.5:
-                self.category = predicted_category
-                self.auto_categorized = True
-                self.confidence_score = confidence
+        needs_category = self.pk is None and self.category_id is None
         
         super().save(*args, **kwargs)
+        
+        # Auto-categorize in the background once the row is committed,
+        # keeping model loading and inference off the request path
+        if needs_category:
+            from django.db import transaction as db_transaction
+            
+            pk = self.pk
+            db_transaction.on_commit(lambda: enqueue_categorization([pk]))
+
+
+def enqueue_categorization(transaction_ids):
+    """
+    Queue categorize_transactions for committed rows
+    Without a reachable broker (the Redis-less demo setup) categorize inline
+    instead; the rows are already saved, so errors are logged, not raised
+    """
+    from financeflow.celery import enqueue_fast
+    from tasks.tasks import categorize_transactions
+    
+    try:
+        # Nothing waits on the result, so skip the result backend entirely
+        enqueue_fast(categorize_transactions, transaction_ids, ignore_result=True)
+        return
+    except Exception as e:
+        logger.warning(f"Couldn't queue categorization, categorizing inline: {e}")
+    
+    try:
+        categorize_transactions(transaction_ids)
+    except Exception as e:
+        logger.error(f"Error categorizing transactions {transaction_ids}: {e}")
+
+
+def cents_to_decimal(cents):
+    """Convert an integer number of cents (or None) to a 2-place Decimal"""
+    return Decimal(cents or 0).scaleb(-2)
+
+
+class DailyTotal(models.Model):
+    """
+    Per-user daily totals for each transaction type
+    Maintained by database triggers on the transactions table, so reports can
+    sum a handful of rollup rows instead of every transaction; never written
+    from Django
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    date = models.DateField()
+    type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    # Integer cents: SUM over bigint is cheaper than over numeric and stays
+    # exact on SQLite, which would otherwise accumulate floating point drift
+    total_cents = models.BigIntegerField(default=0)
+    transaction_count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'user_daily_totals'
+        constraints = [
+            # Conflict target of the triggers' upsert; also serves range lookups
+            models.UniqueConstraint(
+                fields=['user', 'date', 'type'],
+                name='user_daily_totals_user_date_type'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} - {self.type}: ${self.total} ({self.transaction_count})"
+    
+    @property
+    def total(self):
+        return cents_to_decimal(self.total_cents)
+
+
+class BudgetQuerySet(models.QuerySet):
+    """Budget queries with spending computed in the database"""
+    
+    def with_spending(self):
+        """
+        Annotate each budget with current_spending, summed in the same query
+        over the owner's transactions inside the budget's own date window
+        """
+        # Correlated on (user, category) so the (user, category) index is used;
+        # joining category -> transactions would pull in every user's rows for
+        # shared system categories before filtering them out
+        spending = Transaction.objects.filter(
+            user_id=models.OuterRef('user_id'),
+            category_id=models.OuterRef('category_id'),
+            date__gte=models.OuterRef('start_date'),
+            date__lte=Coalesce(models.OuterRef('end_date'), models.Value(datetime.date.max))
+        ).order_by().values('category_id').annotate(
+            total=models.Sum('amount')
+        ).values('total')
+        
+        return self.annotate(
+            current_spending=Coalesce(
+                models.Subquery(spending),
+                models.Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            )
+        )
+    
+    def at_alert_threshold(self):
+        """
+        with_spending(), narrowed in SQL to budgets whose spending has reached
+        alert_threshold percent of their amount
+        """
+        # Compare spending * 100 with threshold * amount to avoid division
+        return self.with_spending().alias(
+            spending_x100=models.F('current_spending') * 100
+        ).filter(
+            amount__gt=0,
+            spending_x100__gte=models.F('alert_threshold') * models.F('amount')
+        )
 
 
 class Budget(models.Model):
@@ -156,6 +278,8 @@ class Budget(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BudgetQuerySet.as_manager()
+    
     class Meta:
         db_table = 'budgets'
         ordering = ['-created_at']
@@ -167,13 +291,28 @@ class Budget(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.category.name} - ${self.amount}/{self.period}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # The category or dates may have changed, so spending read for the old
+        # values (cached or annotated by with_spending) no longer applies
+        self._cached_spending = None
+        self.current_spending = None
+    
     def get_spending(self):
         """Calculate current spending for this budget period"""
         from django.db.models import Sum
         
+        # Callers that already know the spending can set _cached_spending;
+        # Budget.objects.with_spending() provides it as current_spending
+        cached = getattr(self, '_cached_spending', None)
+        if cached is None:
+            cached = getattr(self, 'current_spending', None)
+        if cached is not None:
+            return cached
+        
         filters = {
-            'user': self.user,
-            'category': self.category,
+            'user_id': self.user_id,
+            'category_id': self.category_id,
             'date__gte': self.start_date,
         }
         
@@ -184,6 +323,8 @@ class Budget(models.Model):
             total=Sum('amount')
         )['total'] or Decimal('0.00')
         
+        # Keep it for get_percentage_used / is_over_budget / should_alert
+        self._cached_spending = total
         return total
     
     def get_percentage_used(self):
@@ -0,0 +1,39 @@
+"""
+Tests for transaction creation and background categorization
+"""
+from unittest import mock
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from tasks.tasks import categorize_transactions
+from .models import Category, Transaction
+
+
+class EnqueueCategorizationTests(APITestCase):
+    """Creating a transaction must not depend on Celery being reachable"""
+    
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='s3cret-pass'
+        )
+        self.dining = Category.objects.create(name='Dining', type='expense', is_system=True)
+        self.client.force_authenticate(self.user)
+    
+    def test_create_categorizes_inline_when_enqueue_fails(self):
+        payload = {
+            'date': '2026-10-10',
+            'amount': '12.50',
+            'type': 'expense',
+            'description': 'Starbucks coffee',
+        }
+        failure = RuntimeError('Retry limit exceeded while trying to reconnect')
+        
+        with mock.patch.object(categorize_transactions, 'apply_async', side_effect=failure):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/transactions/', payload, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        transaction = Transaction.objects.get(id=response.data['id'])
+        self.assertEqual(transaction.category, self.dining)
+        self.assertTrue(transaction.auto_categorized)
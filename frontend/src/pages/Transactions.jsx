@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { transactionsAPI, categoriesAPI } from '../services/api';
+import { transactionsAPI, categoriesAPI, tasksAPI } from '../services/api';
 import { formatCurrency, formatDate, getTransactionTypeColor } from '../utils/helpers';
 import { toast } from 'react-toastify';
 import { Plus, Upload, Search, Filter } from 'lucide-react';
@@ -76,9 +76,22 @@ const Transactions = () => {
     if (!file) return;
 
     try {
-      const result = await transactionsAPI.bulkUpload(file);
-      toast.success(`Uploaded ${result.data.created} transactions`);
-      fetchData();
+      const upload = await transactionsAPI.bulkUpload(file);
+      toast.info('Upload started, processing in the background...');
+
+      // The import runs in a worker; poll until it finishes
+      const poll = async () => {
+        const { data } = await tasksAPI.getStatus(upload.data.task_id);
+        if (data.status === 'SUCCESS') {
+          toast.success(`Uploaded ${data.result.created} transactions`);
+          fetchData();
+        } else if (data.status === 'FAILURE') {
+          toast.error('Bulk upload failed');
+        } else {
+          setTimeout(poll, 1000);
+        }
+      };
+      poll();
     } catch (error) {
       toast.error('Bulk upload failed');
     }
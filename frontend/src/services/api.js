@@ -79,6 +79,11 @@ export const transactionsAPI = {
   bulkCategorize: () => api.post('/transactions/bulk_categorize/'),
 };
 
+// Background tasks API
+export const tasksAPI = {
+  getStatus: (taskId) => api.get(`/tasks/${taskId}/`),
+};
+
 // Categories API
 export const categoriesAPI = {
   getAll: () => api.get('/categories/'),